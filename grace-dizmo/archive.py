@@ -0,0 +1,291 @@
+from __future__ import absolute_import
+from builtins import object
+import os
+import zlib
+import struct
+import tempfile
+from grace.error import FileNotWritableError
+from .utils import scan_tree, load_manifest, write_manifest, replace_file, make_dirs, run_parallel
+
+
+MANIFEST_VERSION = 2
+CHUNK_SIZE = 65536
+
+# Compressed entries are written in order, at most this many bytes of source files wait to be written at once.
+BATCH_BYTES = 32 * 1048576
+SPOOL_SIZE = 1048576
+
+# Entries get a fixed timestamp and permissions so identical builds produce identical archives.
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FIXED_ATTRIBUTES = (0o100644 & 0xFFFF) << 16
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_LIMIT = 0xFFFFFFFF
+ZIP_UTF8_FLAG = 0x800
+
+# Record layouts of the zip format (APPNOTE.TXT 4.3.7, 4.3.12 and 4.3.16).
+LOCAL_HEADER = struct.Struct('<4sHHHHHLLLHH')
+CENTRAL_HEADER = struct.Struct('<4sHHHHHHLLLHHHHHLL')
+END_RECORD = struct.Struct('<4sHHHHLLH')
+
+STORED_EXTENSIONS = frozenset([
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ico',
+    '.woff', '.woff2', '.eot',
+    '.zip', '.dzm', '.gz', '.tgz', '.bz2', '.xz', '.7z',
+    '.mp3', '.mp4', '.m4a', '.ogg', '.webm', '.mov'
+])
+
+
+def dos_date_time(date_time):
+    year, month, day, hour, minute, second = date_time
+
+    return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+
+def encode_name(name):
+    if isinstance(name, bytes):
+        name = name.decode('utf-8')
+
+    try:
+        return name.encode('ascii'), 0
+    except UnicodeEncodeError:
+        return name.encode('utf-8'), ZIP_UTF8_FLAG
+
+
+def stored_by_name(name):
+    return os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+
+
+def compress_file(path, dest, level=6, stored=False):
+    # The file is streamed through zlib, only a chunk of it is in memory at a time.
+    compressor = None if stored else zlib.compressobj(level, zlib.DEFLATED, -15)
+    start = dest.tell()
+    crc = 0
+    size = 0
+
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            crc = zlib.crc32(block, crc)
+            size += len(block)
+            dest.write(block if compressor is None else compressor.compress(block))
+
+    if compressor is not None:
+        dest.write(compressor.flush())
+
+    compressed_size = dest.tell() - start
+    if compressor is not None and compressed_size >= size:
+        # Content that does not shrink is stored as is.
+        dest.seek(start)
+        dest.truncate()
+        return compress_file(path, dest, level, True)
+
+    return {
+        'method': ZIP_STORED if compressor is None else ZIP_DEFLATED,
+        'crc': crc & 0xFFFFFFFF,
+        'size': size,
+        'compressed_size': compressed_size
+    }
+
+
+class ZipWriter(object):
+    def __init__(self, stream):
+        self._stream = stream
+        self._entries = []
+        self._date, self._time = dos_date_time(FIXED_DATE_TIME)
+
+    def add(self, name, entry, data):
+        offset = self._stream.tell()
+        if offset > ZIP_LIMIT or entry['compressed_size'] > ZIP_LIMIT or entry['size'] > ZIP_LIMIT or len(self._entries) >= 0xFFFF:
+            raise FileNotWritableError('The zip file is too large, archives over 4 GB or with more than 65535 files are not supported.')
+
+        filename, flags = encode_name(name)
+        self._stream.write(LOCAL_HEADER.pack(b'PK\x03\x04', 20, flags, entry['method'], self._time, self._date,
+            entry['crc'], entry['compressed_size'], entry['size'], len(filename), 0))
+        self._stream.write(filename)
+
+        # data holds the entry exactly as it is stored, compressed or not.
+        for block in iter(lambda: data.read(CHUNK_SIZE), b''):
+            self._stream.write(block)
+
+        self._entries.append((filename, flags, entry, offset))
+
+    def close(self):
+        start = self._stream.tell()
+
+        for filename, flags, entry, offset in self._entries:
+            self._stream.write(CENTRAL_HEADER.pack(b'PK\x01\x02', 3 << 8 | 20, 20, flags, entry['method'], self._time, self._date,
+                entry['crc'], entry['compressed_size'], entry['size'], len(filename), 0, 0, 0, 0, FIXED_ATTRIBUTES, offset))
+            self._stream.write(filename)
+
+        end = self._stream.tell()
+        if end > ZIP_LIMIT:
+            raise FileNotWritableError('The zip file is too large, archives over 4 GB or with more than 65535 files are not supported.')
+
+        self._stream.write(END_RECORD.pack(b'PK\x05\x06', 0, 0, len(self._entries), len(self._entries), end - start, start, 0))
+
+
+class IncrementalZip(object):
+    def __init__(self, source, prefix, archive_path, manifest_path, level=6):
+        self._source = source
+        self._prefix = prefix
+        self._archive_path = archive_path
+        self._manifest_path = manifest_path
+        self._level = level
+
+        # Every file is kept compressed on its own, only new and changed files are compressed again.
+        self._entries_path = os.path.splitext(manifest_path)[0] + '-entries'
+
+    def update(self):
+        manifest = load_manifest(self._manifest_path)
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('prefix') != self._prefix:
+            manifest = {}
+
+        previous = manifest.get('files', {})
+        entries = manifest.get('entries', {})
+        files = scan_tree(self._source, previous)
+
+        changed = [name for name in files if name not in previous or previous[name]['digest'] != files[name]['digest'] or not self._has_entry(entries.get(name))]
+        removed = [name for name in previous if name not in files]
+
+        if len(changed) == 0 and len(removed) == 0 and os.path.isfile(self._archive_path):
+            return False
+
+        try:
+            make_dirs(self._entries_path)
+
+            for name in changed:
+                entries[name] = self._compress(name, files[name]['digest'])
+            for name in removed:
+                entries.pop(name, None)
+
+            self._write(files, entries)
+            self._remove_unused(entries)
+        except FileNotWritableError:
+            raise
+        except (IOError, OSError):
+            raise FileNotWritableError('Could not write to the zip file.')
+
+        write_manifest(self._manifest_path, {
+            'version': MANIFEST_VERSION,
+            'prefix': self._prefix,
+            'files': files,
+            'entries': entries
+        })
+
+        return True
+
+    def _entry_path(self, entry):
+        return os.path.join(self._entries_path, entry['key'])
+
+    def _has_entry(self, entry):
+        if entry is None:
+            return False
+
+        path = self._entry_path(entry)
+        return os.path.isfile(path) and os.path.getsize(path) == entry['compressed_size']
+
+    def _compress(self, name, digest):
+        stored = stored_by_name(name)
+        path = os.path.join(self._entries_path, digest + ('.stored' if stored else ''))
+
+        with open(path + '.tmp', 'wb') as f:
+            entry = compress_file(os.path.join(self._source, *name.split('/')), f, self._level, stored)
+
+        replace_file(path + '.tmp', path)
+        entry['key'] = os.path.basename(path)
+
+        return entry
+
+    def _write(self, files, entries):
+        make_dirs(os.path.dirname(self._archive_path))
+        tmp_path = self._archive_path + '.tmp'
+
+        with open(tmp_path, 'wb') as f:
+            writer = ZipWriter(f)
+            for name in sorted(files):
+                with open(self._entry_path(entries[name]), 'rb') as data:
+                    writer.add(self._prefix + '/' + name, entries[name], data)
+            writer.close()
+
+        replace_file(tmp_path, self._archive_path)
+
+    def _remove_unused(self, entries):
+        used = set(entry['key'] for entry in entries.values())
+
+        for f in os.listdir(self._entries_path):
+            if f not in used:
+                os.remove(os.path.join(self._entries_path, f))
+
+
+def list_files(source):
+    names = []
+
+    for root, dirs, filenames in os.walk(source):
+        for f in filenames:
+            names.append(os.path.relpath(os.path.join(root, f), source).replace(os.sep, '/'))
+
+    return sorted(names)
+
+
+class DeterministicZip(object):
+    def __init__(self, source, prefix, workers=None, level=6):
+        self._source = source
+        self._prefix = prefix
+        self._workers = workers
+        self._level = level
+
+    def write(self, dest):
+        tmp_path = dest + '.tmp'
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                writer = ZipWriter(f)
+
+                # Files are compressed in parallel but written in order, a batch at a time to bound memory.
+                for batch in self._batches(list_files(self._source)):
+                    for name, entry, data in run_parallel(self._compress, batch, self._workers):
+                        try:
+                            data.seek(0)
+                            writer.add(self._prefix + '/' + name, entry, data)
+                        finally:
+                            data.close()
+
+                writer.close()
+        except FileNotWritableError:
+            raise
+        except (IOError, OSError):
+            raise FileNotWritableError('Could not write to the zip file.')
+
+        replace_file(tmp_path, dest)
+
+    def _path(self, name):
+        return os.path.join(self._source, *name.split('/'))
+
+    def _batches(self, names):
+        batch = []
+        size = 0
+
+        for name in names:
+            file_size = os.path.getsize(self._path(name))
+            if len(batch) > 0 and size + file_size > BATCH_BYTES:
+                yield batch
+                batch = []
+                size = 0
+
+            batch.append(name)
+            size += file_size
+
+        if len(batch) > 0:
+            yield batch
+
+    def _compress(self, name):
+        # Large entries spill to disk, small ones stay in memory.
+        data = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        try:
+            entry = compress_file(self._path(name), data, self._level, stored_by_name(name))
+        except:
+            data.close()
+            raise
+
+        return name, entry, data
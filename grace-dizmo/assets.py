@@ -0,0 +1,63 @@
+from __future__ import absolute_import
+from builtins import object
+import os
+from .utils import files_identical, copy_file, run_parallel
+
+
+IMAGE_ASSETS = ['Icon.png', 'Icon-dark.png', 'Icon.svg', 'Icon-dark.svg', 'Preview.png']
+TEST_ICONS = ['Icon.svg', 'Icon.png']
+
+
+def get_image_assets(build_path):
+    locations = [os.getcwd(), os.path.join(build_path, 'assets')]
+
+    return [{'name': name, 'locations': locations} for name in IMAGE_ASSETS]
+
+
+def find_asset(name, locations):
+    for location in locations:
+        path = os.path.join(location, name)
+        if os.path.isfile(path):
+            return path
+
+    return None
+
+
+def find_test_icon(cwd):
+    locations = [os.path.join(cwd, 'assets'), cwd]
+
+    for name in TEST_ICONS:
+        path = find_asset(name, locations)
+        if path is not None:
+            return name, path
+
+    return None, None
+
+
+class AssetStage(object):
+    def __init__(self, assets, destination, workers=None):
+        self._assets = assets
+        self._destination = destination
+        self._workers = workers
+
+    def run(self):
+        jobs = []
+        for asset in self._assets:
+            source = find_asset(asset['name'], asset['locations'])
+            if source is not None:
+                jobs.append((asset['name'], source, os.path.join(self._destination, asset.get('target', asset['name']))))
+
+        return run_parallel(self._sync, jobs, self._workers)
+
+    def _sync(self, job):
+        name, source, dest = job
+
+        if files_identical(source, dest):
+            return name, 'unchanged'
+
+        try:
+            copy_file(source, dest)
+        except (IOError, OSError):
+            return name, 'failed'
+
+        return name, 'copied'
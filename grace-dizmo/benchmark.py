@@ -0,0 +1,272 @@
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import division
+import os
+import time
+import shutil
+import argparse
+import plistlib
+import tempfile
+from grace.error import RemoteServerError
+from .archive import DeterministicZip
+from .mockstore import MockStore
+from .plists import dump_plist
+from .store import StoreClient, BundleUploader
+from .utils import format_size, format_table, run_parallel
+
+
+PREPARE_ATTEMPTS = 20
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def make_bundle(folder, bundle, version, size):
+    source = os.path.join(folder, 'src')
+    if os.path.exists(source):
+        shutil.rmtree(source)
+    os.makedirs(source)
+
+    plist = {'BundleIdentifier': bundle, 'BundleShortVersionString': version}
+    with open(os.path.join(source, 'Info.plist'), 'wb') as f:
+        if hasattr(plistlib, 'dumps'):
+            f.write(plistlib.dumps(plist))
+        else:
+            f.write(plistlib.writePlistToString(plist))
+
+    # Random data does not compress, so the bundle keeps the requested size.
+    with open(os.path.join(source, 'payload.bin'), 'wb') as f:
+        f.write(os.urandom(size))
+
+    path = os.path.join(folder, bundle + '-' + version + '.dzm')
+    DeterministicZip(source, 'bundle').write(path)
+
+    return path
+
+
+class Benchmark(object):
+    def __init__(self, runs=10, size=1048576, concurrency=4, latency=0, bandwidth=None, error_rate=0, retries=3):
+        self.runs = runs
+        self.size = size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.results = []
+
+        self._store = MockStore(latency=latency, bandwidth=bandwidth, error_rate=error_rate, seed=0)
+        self._folder = tempfile.mkdtemp()
+
+    def _client(self):
+        return StoreClient(self._store.url, retries=self.retries, backoff=0.01, pool_size=max(10, self.concurrency))
+
+    def _succeeded(self, func, arg, status):
+        try:
+            return func(arg).status_code == status
+        except RemoteServerError:
+            return False
+
+    def _prepare(self, action, func, arg, status):
+        # Requests that only set up a benchmark are not measured, they are repeated until the store accepts them.
+        for attempt in range(PREPARE_ATTEMPTS):
+            if self._succeeded(func, arg, status):
+                return
+
+        raise RemoteServerError('Could not ' + action + ' on the mock store.')
+
+    def _measure(self, name, func, count, status, bytes_per_run=0):
+        timings = []
+        failed = 0
+        started = time.time()
+
+        for index in range(count):
+            start = time.time()
+            if self._succeeded(func, index, status):
+                timings.append(time.time() - start)
+            else:
+                failed += 1
+
+        self._record(name, timings, failed, time.time() - started, bytes_per_run)
+
+    def _record(self, name, timings, failed, total, bytes_per_run=0):
+        # Failed requests are only counted, their time would skew the latency and throughput of the others.
+        mean = p95 = throughput = '-'
+        if len(timings) > 0:
+            mean = '%.1f ms' % (sum(timings) / len(timings) * 1000)
+            p95 = '%.1f ms' % (percentile(timings, 0.95) * 1000)
+            throughput = ''
+            if bytes_per_run > 0 and total > 0:
+                throughput = format_size(bytes_per_run * len(timings) / total) + '/s'
+
+        self.results.append([
+            name,
+            str(len(timings) + failed),
+            str(failed),
+            mean,
+            p95,
+            '%.2f s' % total,
+            throughput
+        ])
+
+    def bench_login(self):
+        client = self._client()
+        self._measure('login', lambda index: client.login('user', 'password'), self.runs, 200)
+        client.close()
+
+    def bench_upload(self):
+        client = self._client()
+        self._prepare('log in', lambda arg: client.login('user', 'password'), None, 200)
+
+        paths = [make_bundle(self._folder, 'bench.upload', '1.' + str(index), self.size) for index in range(self.runs)]
+        size = os.path.getsize(paths[0])
+
+        def upload(index):
+            return BundleUploader(paths[index], client, show_progress=False).upload('post', client.url('dizmo'))
+
+        self._measure('upload', upload, self.runs, 201, size)
+
+        def upload_ranges(index):
+            return BundleUploader(paths[index], client, resumable=True, show_progress=False).upload('put', client.url('dizmo', 'bench.upload'))
+
+        self._measure('upload (ranged)', upload_ranges, self.runs, 200, size)
+        client.close()
+
+    def bench_publish(self):
+        client = self._client()
+        self._prepare('log in', lambda arg: client.login('user', 'password'), None, 200)
+
+        versions = ['1.' + str(index) for index in range(self.runs)]
+        for version in versions:
+            path = make_bundle(self._folder, 'bench.publish', version, 1024)
+            self._prepare('upload bench.publish ' + version, lambda path: BundleUploader(path, client, show_progress=False).upload('post', client.url('dizmo')), path, 201)
+
+        def publish(version):
+            return client.put(client.url('dizmo', 'bench.publish', 'publish', version), data='{"publish": true}', headers={'Content-Type': 'application/json'})
+
+        self._measure('publish (serial)', lambda index: publish(versions[index]), self.runs, 200)
+
+        def publish_timed(version):
+            start = time.time()
+            succeeded = self._succeeded(publish, version, 200)
+            return succeeded, time.time() - start
+
+        started = time.time()
+        results = run_parallel(publish_timed, versions, self.concurrency)
+        self._record('publish (' + str(self.concurrency) + ' parallel)',
+            [elapsed for succeeded, elapsed in results if succeeded],
+            len([succeeded for succeeded, elapsed in results if not succeeded]),
+            time.time() - started)
+
+        self._measure('publish status', lambda index: client.get(client.url('dizmo', 'bench.publish', 'publish')), self.runs, 200)
+        client.close()
+
+    def run(self):
+        self._store.start()
+
+        try:
+            self.bench_login()
+            self.bench_upload()
+            self.bench_publish()
+        finally:
+            self._store.stop()
+            shutil.rmtree(self._folder, True)
+
+        return format_table(['Benchmark', 'Runs', 'Failed', 'Mean', 'p95', 'Total', 'Throughput'], self.results)
+
+
+def make_tree_values(entries):
+    values = {}
+    for index in range(entries):
+        values['entry' + str(index)] = {
+            'title': u'Entry \u2116 ' + str(index) + ' <with> & markup',
+            'count': index,
+            'ratio': index / 7.0,
+            'enabled': index % 2 == 0,
+            'tags': ['tag' + str(index % 10), 'shared'],
+            'children': [{'id': index * 10 + child, 'label': 'child ' + str(child)} for child in range(3)]
+        }
+
+    return values
+
+
+class PlistBenchmark(object):
+    def __init__(self, runs=10, entries=5000):
+        self.runs = runs
+        self.plist = {
+            'BundleIdentifier': 'com.example.benchmark',
+            'BundleShortVersionString': '1.0',
+            'Attributes': make_tree_values(entries),
+            'Private': make_tree_values(entries // 10),
+            'Public': make_tree_values(entries // 10)
+        }
+        self.results = []
+        self._folder = tempfile.mkdtemp()
+
+    def _plistlib_binary(self, plist, path):
+        with open(path, 'wb') as f:
+            plistlib.dump(plist, f, fmt=plistlib.FMT_BINARY)
+
+    def _measure(self, fmt, name, write):
+        path = os.path.join(self._folder, name + '.' + fmt + '.plist')
+        timings = []
+        for index in range(self.runs):
+            start = time.time()
+            write(self.plist, path)
+            timings.append(time.time() - start)
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        parse = []
+        for index in range(self.runs):
+            start = time.time()
+            if hasattr(plistlib, 'loads'):
+                plistlib.loads(data)
+            else:
+                plistlib.readPlistFromString(data)
+            parse.append(time.time() - start)
+
+        self.results.append([
+            fmt,
+            name,
+            '%.1f ms' % (sum(timings) / len(timings) * 1000),
+            '%.1f ms' % (percentile(timings, 0.95) * 1000),
+            format_size(len(data)),
+            '%.1f ms' % (sum(parse) / len(parse) * 1000)
+        ])
+
+    def run(self):
+        try:
+            for fmt in ['xml', 'binary']:
+                self._measure(fmt, 'grace-dizmo', lambda plist, path: dump_plist(plist, path, fmt))
+
+            # XML plists are written by plistlib itself, python 2 has no binary plist writer.
+            if hasattr(plistlib, 'FMT_BINARY'):
+                self._measure('binary', 'plistlib', self._plistlib_binary)
+        finally:
+            shutil.rmtree(self._folder, True)
+
+        return format_table(['Format', 'Writer', 'Write', 'p95', 'Size', 'Parse'], self.results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the store client against a local stand-in store, or the Info.plist formats.')
+    parser.add_argument('suite', nargs='?', choices=['store', 'plist'], default='store')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--size', type=int, default=1048576, help='bytes per uploaded bundle')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0, help='seconds the store adds to every request')
+    parser.add_argument('--bandwidth', type=int, default=None, help='bytes per second the store accepts')
+    parser.add_argument('--error-rate', type=float, default=0, help='share of requests the store fails')
+    parser.add_argument('--entries', type=int, default=5000, help='entries in the attributes tree value of the plist')
+    args = parser.parse_args(argv)
+
+    if args.suite == 'plist':
+        print(PlistBenchmark(args.runs, args.entries).run())
+        return
+
+    print(Benchmark(args.runs, args.size, args.concurrency, args.latency, args.bandwidth, args.error_rate).run())
+
+
+if __name__ == '__main__':
+    main()
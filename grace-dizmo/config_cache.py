@@ -0,0 +1,76 @@
+from __future__ import absolute_import
+from builtins import object
+import os
+import json
+import hashlib
+from copy import deepcopy
+import grace.config
+from grace.utils import write_json
+from .utils import load_manifest, make_dirs, replace_file
+
+
+CODE_FILES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plugin.py'),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.py'),
+    grace.config.__file__
+]
+
+
+def stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return [stat.st_size, stat.st_mtime]
+
+
+def config_digest(*values):
+    # Changes to the code parsing the config invalidate every cached config.
+    code = [stat_signature(path) for path in CODE_FILES]
+
+    return hashlib.sha1(json.dumps([code, values], sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ConfigCache(object):
+    def __init__(self, path):
+        self._path = path
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = load_manifest(self._path)
+
+        return self._entries
+
+    def get(self, section, key):
+        entry = self._load().get(section)
+        if not isinstance(entry, dict) or entry.get('key') != key:
+            return None
+
+        return deepcopy(entry['value'])
+
+    def set(self, section, key, value):
+        entries = self._load()
+        entries[section] = {
+            'key': key,
+            'value': deepcopy(value)
+        }
+
+        # The cache only saves time, a project that can not be written to still builds.
+        try:
+            self._save(entries)
+        except (IOError, OSError):
+            pass
+
+    def _save(self, entries):
+        make_dirs(os.path.dirname(self._path))
+        tmp_path = self._path + '.tmp'
+
+        # The merged config contains the credentials of the global config, only the current user may read it.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(write_json(entries))
+
+        os.chmod(tmp_path, 0o600)
+        replace_file(tmp_path, self._path)
@@ -0,0 +1,168 @@
+from __future__ import absolute_import
+import os
+import sys
+import threading
+from shutil import rmtree, copy2
+from grace.error import FileNotWritableError, FolderNotFoundError
+from .utils import make_dirs, scan_tree, file_digest, replace_file, load_manifest, write_manifest
+
+
+# renameat2 flag to swap two paths atomically (linux/fs.h)
+RENAME_EXCHANGE = 2
+AT_FDCWD = -100
+
+_renameat2 = None
+
+
+def _get_renameat2():
+    global _renameat2
+
+    if _renameat2 is None:
+        _renameat2 = False
+
+        if sys.platform.startswith('linux'):
+            try:
+                import ctypes
+                libc = ctypes.CDLL(None, use_errno=True)
+                _renameat2 = getattr(libc, 'renameat2', False)
+            except (OSError, AttributeError):
+                _renameat2 = False
+
+    return _renameat2
+
+
+def exchange(first, second):
+    renameat2 = _get_renameat2()
+    if not renameat2:
+        return False
+
+    result = renameat2(AT_FDCWD, _encode(first), AT_FDCWD, _encode(second), RENAME_EXCHANGE)
+    return result == 0
+
+
+def _encode(path):
+    if isinstance(path, bytes):
+        return path
+    return path.encode(sys.getfilesystemencoding() or 'utf-8')
+
+
+def get_previous_path(dest):
+    return os.path.join(os.path.dirname(dest), '.grace', 'previous', os.path.basename(dest))
+
+
+def remove_in_background(path):
+    trash = path + '.' + str(os.getpid()) + '.trash'
+
+    try:
+        os.rename(path, trash)
+    except OSError:
+        rmtree(path, True)
+        return None
+
+    thread = threading.Thread(target=rmtree, args=(trash, True))
+    thread.start()
+
+    return thread
+
+
+def swap_folder(staged, dest):
+    previous = get_previous_path(dest)
+    make_dirs(os.path.dirname(previous))
+
+    if os.path.exists(previous):
+        remove_in_background(previous)
+
+    if not os.path.exists(dest):
+        os.rename(staged, dest)
+        return False
+
+    if exchange(staged, dest):
+        os.rename(staged, previous)
+        return True
+
+    # Without renameat2 the old version is moved away first, which leaves a short gap.
+    os.rename(dest, previous)
+    try:
+        os.rename(staged, dest)
+    except OSError:
+        os.rename(previous, dest)
+        raise
+
+    return True
+
+
+def rollback_folder(dest):
+    previous = get_previous_path(dest)
+    if not os.path.exists(previous):
+        raise FolderNotFoundError('There is no previous deployment to roll back to.')
+
+    if os.path.exists(dest):
+        if exchange(previous, dest):
+            return
+
+        staged = previous + '.' + str(os.getpid()) + '.rollback'
+        try:
+            os.rename(previous, staged)
+            os.rename(dest, previous)
+            os.rename(staged, dest)
+        except OSError:
+            raise FileNotWritableError('Could not roll back the deployed dizmo.')
+    else:
+        os.rename(previous, dest)
+
+
+def sync_tree(source, dest, manifest_path):
+    manifest = load_manifest(manifest_path)
+    if manifest.get('dest') != dest:
+        manifest = {}
+
+    deployed = manifest.get('files', {})
+    files = scan_tree(source, manifest.get('source', {}))
+    stats = {'added': 0, 'modified': 0, 'removed': 0}
+    state = {}
+
+    for name in sorted(files):
+        target = os.path.join(dest, *name.split('/'))
+
+        try:
+            stat = os.stat(target)
+        except OSError:
+            stat = None
+
+        if stat is not None:
+            entry = deployed.get(name)
+            if entry is not None and entry['digest'] == files[name]['digest'] and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                state[name] = entry
+                continue
+
+            if stat.st_size == files[name]['size'] and file_digest(target) == files[name]['digest']:
+                state[name] = {'digest': files[name]['digest'], 'size': stat.st_size, 'mtime': stat.st_mtime}
+                continue
+
+        existed = stat is not None
+
+        make_dirs(os.path.dirname(target))
+        copy2(os.path.join(source, name), target + '.tmp')
+        replace_file(target + '.tmp', target)
+
+        stat = os.stat(target)
+        state[name] = {'digest': files[name]['digest'], 'size': stat.st_size, 'mtime': stat.st_mtime}
+        stats['modified' if existed else 'added'] += 1
+
+    for root, dirs, filenames in os.walk(dest, topdown=False):
+        for f in filenames:
+            name = os.path.relpath(os.path.join(root, f), dest).replace(os.sep, '/')
+            if name not in files:
+                os.remove(os.path.join(root, f))
+                stats['removed'] += 1
+
+        if root != dest and len(os.listdir(root)) == 0:
+            os.rmdir(root)
+
+    write_manifest(manifest_path, {
+        'dest': dest,
+        'source': files,
+        'files': state
+    })
+
+    return stats
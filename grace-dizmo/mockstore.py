@@ -0,0 +1,310 @@
+from __future__ import print_function
+from __future__ import absolute_import
+import io
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import hashlib
+import zipfile
+import plistlib
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+def read_bundle_info(data):
+    z = zipfile.ZipFile(io.BytesIO(data))
+    try:
+        for name in z.namelist():
+            if name.count('/') == 1 and name.endswith('/Info.plist'):
+                content = z.read(name)
+                if hasattr(plistlib, 'loads'):
+                    return plistlib.loads(content)
+                return plistlib.readPlistFromString(content)
+    finally:
+        z.close()
+
+    return None
+
+
+def parse_multipart(content_type, body):
+    match = re.search(r'boundary=([^;]+)', content_type)
+    if match is None:
+        return None
+
+    boundary = b'--' + match.group(1).strip('"').encode('utf-8')
+    for part in body.split(boundary):
+        head, sep, content = part.partition(b'\r\n\r\n')
+        if sep and b'filename=' in head:
+            if content.endswith(b'\r\n'):
+                content = content[:-2]
+            return content
+
+    return None
+
+
+class StoreState(object):
+    def __init__(self, users=None):
+        self.users = users if users is not None else {'user': 'password'}
+        self.sessions = {}
+        self.dizmos = {}
+        self.partial = {}
+        self.lock = threading.Lock()
+
+    def add_bundle(self, data):
+        info = read_bundle_info(data)
+        if info is None:
+            return None
+
+        bundle = info['BundleIdentifier']
+        version = info['BundleShortVersionString']
+
+        with self.lock:
+            dizmo = self.dizmos.setdefault(bundle, {'versions': {}, 'latest': None})
+            dizmo['versions'][version] = {
+                'version': version,
+                'published': False,
+                'sha1': hashlib.sha1(data).hexdigest(),
+                'size': len(data)
+            }
+            dizmo['latest'] = version
+
+        return bundle, version
+
+
+class StoreHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # Send each response in one write, otherwise delayed acks add 40ms to every request.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(chunks)
+
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length > 0 else b''
+
+    def _send(self, status, body=None, headers=None):
+        data = b''
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, number, message):
+        self._send(status, {'errornumber': number, 'errormessage': message})
+
+    def _receive_range(self, bundle, content_range, body):
+        state = self.server.state
+
+        match = re.match(r'^bytes (?:(\d+)-(\d+)|\*)/(\d+)$', content_range.strip())
+        if match is None:
+            self._error(400, 12, 'Invalid Content-Range header.')
+            return None
+
+        total = int(match.group(3))
+        with state.lock:
+            received = state.partial.setdefault(bundle, bytearray())
+
+            if match.group(1) is not None:
+                start = int(match.group(1))
+                if start > len(received):
+                    self._error(416, 13, 'The upload has a gap at byte ' + str(len(received)) + '.')
+                    return None
+
+                del received[start:]
+                received.extend(body)
+
+            if len(received) < total:
+                headers = {}
+                if len(received) > 0:
+                    headers['Range'] = 'bytes=0-' + str(len(received) - 1)
+                self._send(308, None, headers)
+                return None
+
+            state.partial.pop(bundle)
+
+        return bytes(received)
+
+    def _authorized(self):
+        match = re.search(r'session=([0-9a-f]+)', self.headers.get('Cookie', ''))
+        return match is not None and match.group(1) in self.server.state.sessions
+
+    def _dispatch(self, method):
+        server = self.server
+        body = self._read_body()
+
+        if server.latency > 0:
+            time.sleep(server.latency)
+        if server.bandwidth is not None and len(body) > 0:
+            time.sleep(len(body) / float(server.bandwidth))
+
+        if server.error_rate > 0 and server.random.random() < server.error_rate:
+            return self._error(server.error_status, 11, 'Injected error.')
+
+        path = self.path.split('?')[0].rstrip('/')
+        parts = [part for part in path.split('/') if part]
+        state = self.server.state
+
+        if method == 'POST' and parts == ['oauth', 'login']:
+            try:
+                credentials = json.loads(body.decode('utf-8'))
+            except ValueError:
+                return self._error(400, 1, 'Invalid login request.')
+
+            if state.users.get(credentials.get('username')) != credentials.get('password'):
+                return self._error(401, 2, 'Wrong username or password.')
+
+            session = uuid.uuid4().hex
+            with state.lock:
+                state.sessions[session] = credentials['username']
+
+            return self._send(200, {'username': credentials['username']}, {'Set-Cookie': 'session=' + session + '; Path=/'})
+
+        if not self._authorized():
+            return self._error(401, 3, 'Not logged in.')
+
+        content_range = self.headers.get('Content-Range')
+        if len(parts) == 2 and parts[0] == 'dizmo' and method == 'PUT' and content_range is not None:
+            data = self._receive_range(parts[1], content_range, body)
+            if data is None:
+                return
+        elif len(parts) in [1, 2] and parts[0] == 'dizmo' and method in ['POST', 'PUT']:
+            data = parse_multipart(self.headers.get('Content-Type', ''), body)
+        else:
+            data = None
+
+        if len(parts) in [1, 2] and parts[0] == 'dizmo' and method in ['POST', 'PUT']:
+            if data is None:
+                return self._error(400, 4, 'No bundle was uploaded.')
+
+            try:
+                added = state.add_bundle(data)
+            except (zipfile.BadZipfile, KeyError, ValueError):
+                added = None
+
+            if added is None:
+                return self._error(400, 5, 'The uploaded bundle is not a valid dizmo.')
+            if len(parts) == 2 and added[0] != parts[1]:
+                return self._error(400, 6, 'The uploaded bundle does not match ' + parts[1] + '.')
+
+            return self._send(201 if method == 'POST' else 200, {'bundle_identifier': added[0], 'version': added[1]})
+
+        if len(parts) >= 3 and parts[0] == 'dizmo' and parts[2] == 'publish':
+            dizmo = state.dizmos.get(parts[1])
+            if dizmo is None:
+                return self._error(404, 7, 'There is no dizmo with the id ' + parts[1] + '.')
+
+            if len(parts) == 3 and method == 'GET':
+                return self._send(200, {'bundle_identifier': parts[1], 'versions': sorted(dizmo['versions'].values(), key=lambda v: v['version'])})
+
+            if len(parts) == 4 and parts[3] == 'latest' and method == 'GET':
+                return self._send(200, dizmo['versions'][dizmo['latest']])
+
+            if len(parts) == 4 and method == 'PUT':
+                version = dizmo['versions'].get(parts[3])
+                if version is None:
+                    return self._error(404, 8, 'There is no version ' + parts[3] + ' of ' + parts[1] + '.')
+
+                try:
+                    version['published'] = bool(json.loads(body.decode('utf-8'))['publish'])
+                except (ValueError, KeyError):
+                    return self._error(400, 9, 'Invalid publish request.')
+
+                return self._send(200, version)
+
+        return self._error(404, 10, 'Unknown request: ' + method + ' ' + self.path)
+
+
+class MockStore(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, users=None, verbose=False, latency=0, bandwidth=None, error_rate=0, error_status=503, seed=None):
+        HTTPServer.__init__(self, ('127.0.0.1', port), StoreHandler)
+        self.state = StoreState(users)
+        self.verbose = verbose
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:' + str(self.server_address[1])
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the dizmo store.')
+    parser.add_argument('port', nargs='?', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every request')
+    parser.add_argument('--bandwidth', type=int, default=None, help='bytes per second for request bodies')
+    parser.add_argument('--error-rate', type=float, default=0, help='share of requests answered with an error')
+    parser.add_argument('--error-status', type=int, default=503, help='status code of injected errors')
+    args = parser.parse_args(argv)
+
+    store = MockStore(args.port, verbose=True,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        error_rate=args.error_rate,
+        error_status=args.error_status
+    )
+    print('Serving a local dizmo store on ' + store.url + ' (user "user", password "password").')
+
+    try:
+        store.serve_forever()
+    except KeyboardInterrupt:
+        store.server_close()
+
+
+if __name__ == '__main__':
+    main()
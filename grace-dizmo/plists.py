@@ -0,0 +1,318 @@
+from __future__ import absolute_import
+from __future__ import division
+from builtins import object
+import io
+import os
+import sys
+import json
+import struct
+import hashlib
+import plistlib
+from numbers import Integral
+from grace.error import FileNotWritableError
+from grace.utils import isstring
+
+
+REFERENCE_FORMATS = {1: 'B', 2: 'H', 4: 'L', 8: 'Q'}
+
+try:
+    STRING_TYPES = (basestring,)
+except NameError:
+    STRING_TYPES = (str, bytes)
+
+
+def _escapeAndEncode(text):
+    m = plistlib._controlCharPat.search(text)
+    if m is not None:
+        raise ValueError("strings can't contains control characters; "
+                         "use plistlib.Data instead")
+    text = text.replace("\r\n", "\n")       # convert DOS line endings
+    text = text.replace("\r", "\n")         # convert Mac line endings
+    text = text.replace("&", "&amp;")       # escape '&'
+    text = text.replace("<", "&lt;")        # escape '<'
+    text = text.replace(">", "&gt;")        # escape '>'
+
+    return text
+
+
+def writeDict(self, d):
+    self.beginElement("dict")
+    items = d.items()
+    for key, value in items:
+        if not isstring(key):
+            raise TypeError("keys must be strings")
+        self.simpleElement("key", key)
+        self.writeValue(value)
+    self.endElement("dict")
+
+
+if sys.version_info.major < 3:
+    plistlib._escapeAndEncode = _escapeAndEncode
+    plistlib.PlistWriter.writeDict = writeDict
+
+
+def get_plist(config, testname=None, test=False):
+    embedded_bundles = []
+
+    if test:
+        display_name = config['dizmo_settings']['display_name'] + ' ' + testname
+        identifier = config['dizmo_settings']['bundle_identifier'] + '.' + testname.lower()
+    else:
+        display_name = config['dizmo_settings']['display_name']
+        identifier = config['dizmo_settings']['bundle_identifier']
+
+        for index, project in enumerate(config['embedded_projects']):
+            embedded_bundles.append(project['bundle_identifier'])
+
+    plist = dict(
+        BundleDisplayName=display_name,
+        BundleIdentifier=identifier,
+        BundleName=config['dizmo_settings']['bundle_name'],
+        BundleShortVersionString=config['version'],
+        BundleVersion=config['version'],
+        CloseBoxInsetX=config['dizmo_settings']['box_inset_x'],
+        CloseBoxInsetY=config['dizmo_settings']['box_inset_y'],
+        MainHTML=config['dizmo_settings']['main_html'],
+        Width=config['dizmo_settings']['width'],
+        Height=config['dizmo_settings']['height'],
+        ApiVersion=config['dizmo_settings']['api_version'],
+        ElementsVersion=config['dizmo_settings']['elements_version'],
+        Description=config['dizmo_settings']['description'],
+        ChangeLog=config['dizmo_settings']['change_log'],
+        MinSpaceVersion=config['dizmo_settings']['min_space_version'],
+        Tags=config['dizmo_settings']['tags'],
+        Category=config['dizmo_settings']['category'],
+        HiddenDizmo=config['dizmo_settings']['hidden_dizmo'],
+        AllowResize=config['dizmo_settings']['allow_resize'],
+        TitleEditable=config['dizmo_settings']['title_editable'],
+        ForceUpdate=config['dizmo_settings']['force_update']
+    )
+
+    if 'additional_plist_values' in config['dizmo_settings']:
+        keys = config['dizmo_settings']['additional_plist_values']
+        for key, value in keys.items():
+            plist[key] = value
+
+    if config['dizmo_settings']['helper_version'] is not None:
+        plist['HelperVersion'] = config['dizmo_settings']['helper_version']
+
+    if config['dizmo_settings']['elements_version'] is not None:
+        plist['ElementsVersion'] = config['dizmo_settings']['elements_version']
+
+    if config['dizmo_settings']['tree_values'] is not None:
+        if config['dizmo_settings']['tree_values']['attributes'] is not None:
+            plist['Attributes'] = config['dizmo_settings']['tree_values']['attributes']
+
+        if config['dizmo_settings']['tree_values']['private'] is not None:
+            plist['Private'] = config['dizmo_settings']['tree_values']['private']
+
+        if config['dizmo_settings']['tree_values']['public'] is not None:
+            plist['Public'] = config['dizmo_settings']['tree_values']['public']
+
+    if len(embedded_bundles) != 0:
+        plist['EmbeddedBundles'] = embedded_bundles
+
+    return plist
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+def _sorted_items(d):
+    for key in d:
+        if not isinstance(key, STRING_TYPES):
+            raise TypeError('The keys of a plist dictionary need to be strings.')
+
+    return sorted(d.items(), key=lambda item: _text(item[0]))
+
+
+def _size_of(count):
+    if count < 1 << 8:
+        return 1
+    if count < 1 << 16:
+        return 2
+    if count < 1 << 32:
+        return 4
+    return 8
+
+
+class BinaryPlistWriter(object):
+    def __init__(self, stream):
+        self._stream = stream
+        self._objects = []
+        self._scalars = {}
+        self._containers = {}
+        self._references = {}
+        self._written = 0
+
+    def write(self, value):
+        # Values are only referenced here, every object is encoded straight into the stream.
+        top = self._flatten(value)
+
+        count = len(self._objects)
+        reference_size = _size_of(count)
+        self._reference_format = REFERENCE_FORMATS[reference_size]
+        offsets = []
+
+        self._write(b'bplist00')
+        for reference, obj in enumerate(self._objects):
+            offsets.append(self._written)
+            self._write_object(obj, reference)
+
+        table_offset = self._written
+        offset_size = _size_of(table_offset)
+        self._write(struct.pack('>' + REFERENCE_FORMATS[offset_size] * count, *offsets))
+        self._write(struct.pack('>5xBBBQQQ', 0, offset_size, reference_size, count, top, table_offset))
+
+    def _write(self, data):
+        self._stream.write(data)
+        self._written += len(data)
+
+    def _flatten(self, value):
+        if isinstance(value, (dict, list, tuple)):
+            reference = self._containers.get(id(value))
+            if reference is not None:
+                return reference
+            reference = self._containers[id(value)] = len(self._objects)
+        else:
+            key = (type(value), value)
+            reference = self._scalars.get(key)
+            if reference is not None:
+                return reference
+            reference = self._scalars[key] = len(self._objects)
+
+        self._objects.append(value)
+
+        if isinstance(value, dict):
+            items = _sorted_items(value)
+            keys = [self._flatten(key) for key, item in items]
+            self._references[reference] = keys + [self._flatten(item) for key, item in items]
+        elif isinstance(value, (list, tuple)):
+            self._references[reference] = [self._flatten(item) for item in value]
+
+        return reference
+
+    def _write_size(self, token, size):
+        if size < 15:
+            self._write(struct.pack('>B', token | size))
+        elif size < 1 << 8:
+            self._write(struct.pack('>BBB', token | 0xF, 0x10, size))
+        elif size < 1 << 16:
+            self._write(struct.pack('>BBH', token | 0xF, 0x11, size))
+        elif size < 1 << 32:
+            self._write(struct.pack('>BBL', token | 0xF, 0x12, size))
+        else:
+            self._write(struct.pack('>BBQ', token | 0xF, 0x13, size))
+
+    def _write_references(self, references):
+        self._write(struct.pack('>' + self._reference_format * len(references), *references))
+
+    def _write_object(self, value, reference):
+        if isinstance(value, STRING_TYPES):
+            text = _text(value)
+            try:
+                data = text.encode('ascii')
+                self._write_size(0x50, len(text))
+            except UnicodeEncodeError:
+                data = text.encode('utf-16be')
+                self._write_size(0x60, len(data) // 2)
+            self._write(data)
+        elif isinstance(value, bool):
+            self._write(b'\x09' if value else b'\x08')
+        elif isinstance(value, Integral):
+            if value < 0:
+                if value < -1 << 63:
+                    raise OverflowError('The integer ' + str(value) + ' is too large for a plist.')
+                self._write(struct.pack('>Bq', 0x13, value))
+            elif value < 1 << 8:
+                self._write(struct.pack('>BB', 0x10, value))
+            elif value < 1 << 16:
+                self._write(struct.pack('>BH', 0x11, value))
+            elif value < 1 << 32:
+                self._write(struct.pack('>BL', 0x12, value))
+            elif value < 1 << 63:
+                self._write(struct.pack('>BQ', 0x13, value))
+            elif value < 1 << 64:
+                self._write(b'\x14' + struct.pack('>QQ', 0, value))
+            else:
+                raise OverflowError('The integer ' + str(value) + ' is too large for a plist.')
+        elif isinstance(value, float):
+            self._write(struct.pack('>Bd', 0x23, value))
+        elif isinstance(value, dict):
+            self._write_size(0xD0, len(value))
+            self._write_references(self._references[reference])
+        elif isinstance(value, (list, tuple)):
+            self._write_size(0xA0, len(value))
+            self._write_references(self._references[reference])
+        else:
+            raise TypeError('Unsupported type in plist: ' + type(value).__name__)
+
+
+def write_xml(plist, stream):
+    if hasattr(plistlib, 'dump'):
+        plistlib.dump(plist, stream, sort_keys=True)
+    else:
+        plistlib.writePlist(plist, stream)
+
+
+def write_binary(plist, stream):
+    BinaryPlistWriter(stream).write(plist)
+
+
+PLIST_WRITERS = {
+    'xml': write_xml,
+    'binary': write_binary
+}
+
+
+def plist_key(config, testname=None, test=False):
+    relevant = {
+        'dizmo_settings': config['dizmo_settings'],
+        'version': config['version'],
+        'format': config['plist']['format'],
+        'testname': testname,
+        'test': test
+    }
+
+    if not test:
+        relevant['embedded_bundles'] = [project['bundle_identifier'] for project in config['embedded_projects']]
+
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def dump_plist(plist, path, format='xml'):
+    with open(path, 'wb') as f:
+        PLIST_WRITERS[format](plist, f)
+
+
+# The last rendered plist of every dizmo and test, so a build in the same process does not render it again.
+_rendered = {}
+
+
+def render_plist(config, testname=None, test=False):
+    key = plist_key(config, testname, test)
+    name = config['name'] if not test else config['name'] + '_' + testname
+
+    cached = _rendered.get(name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    stream = io.BytesIO()
+    PLIST_WRITERS[config['plist']['format']](get_plist(config, testname, test), stream)
+    data = stream.getvalue()
+    _rendered[name] = (key, data)
+
+    return data
+
+
+def write_plist(config, path, testname=None, test=False):
+    data = render_plist(config, testname, test)
+
+    try:
+        with open(os.path.join(path, 'Info.plist'), 'wb') as f:
+            f.write(data)
+    except (IOError, OSError):
+        raise FileNotWritableError('Could not write plist to target location: ' + path)
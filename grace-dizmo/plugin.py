@@ -3,10 +3,9 @@ from builtins import next
 from builtins import input
 from builtins import str
 import os
-import plistlib
-from shutil import move, rmtree, copy
+from shutil import copy2
 import sys
-from grace.error import MissingKeyError, WrongFormatError, FileNotWritableError, RemoveFolderError, UnknownCommandError, WrongLoginCredentials, RemoteServerError, KeyNotAllowedError, FileNotFoundError
+from grace.error import Error, SubProjectError, MissingKeyError, FileNotWritableError, UnknownCommandError, WrongLoginCredentials, RemoteServerError, KeyNotAllowedError, NoExectuableError, FolderNotFoundError
 import grace.create
 import grace.build
 import grace.testit
@@ -14,121 +13,84 @@ import grace.zipit
 import grace.deploy
 import grace.lint
 import grace.config
-from grace.utils import update, load_json, write_json, isstring
-import requests
+from grace.utils import update, load_json, write_json
 import getpass
 from copy import deepcopy
 import hashlib
-import zipfile
 import re
+import shlex
+import subprocess
+import threading
+import time
+from .utils import get_cache_path, copy_file, copy_tree, run_parallel, format_table, load_manifest, write_manifest, file_digest, scan_tree, tree_digest
+from .assets import AssetStage, get_image_assets, find_test_icon
+from .schema import CONFIG_SCHEMA, raise_errors
+from .plists import write_plist
+from .deployment import swap_folder, rollback_folder, sync_tree
+from .trace import TRACE_VARIABLE, start_tracing, stop_tracing, get_tracer, stage
+from .config_cache import ConfigCache, config_digest, stat_signature
 
 
-requests.packages.urllib3.disable_warnings()
+def we_are_frozen():
+    # All of the modules are built-in to the interpreter, e.g., by py2exe
+    return hasattr(sys, "frozen")
 
 
-def _escapeAndEncode(text):
-    m = plistlib._controlCharPat.search(text)
-    if m is not None:
-        raise ValueError("strings can't contains control characters; "
-                         "use plistlib.Data instead")
-    text = text.replace("\r\n", "\n")       # convert DOS line endings
-    text = text.replace("\r", "\n")         # convert Mac line endings
-    text = text.replace("&", "&amp;")       # escape '&'
-    text = text.replace("<", "&lt;")        # escape '<'
-    text = text.replace(">", "&gt;")        # escape '>'
+def get_path():
+    if we_are_frozen():
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(__file__)
 
-    return text
 
+def expand_versions(spec):
+    pattern = re.compile('^([0-9]+\.?)*[0-9]+$')
+    versions = []
 
-def writeDict(self, d):
-    self.beginElement("dict")
-    items = d.items()
-    for key, value in items:
-        if not isstring(key):
-            raise TypeError("keys must be strings")
-        self.simpleElement("key", key)
-        self.writeValue(value)
-    self.endElement("dict")
+    for part in spec.split(','):
+        bounds = part.strip().split('..')
 
+        for bound in bounds:
+            if not pattern.match(bound):
+                raise UnknownCommandError('The provided sub-argument for the task could not be recognized. Use either "display", a version number (0.2, 1.5, etc.), a list of versions (0.2,0.3) or a range (1.2.0..1.2.5)')
 
-if sys.version_info.major < 3:
-    plistlib._escapeAndEncode = _escapeAndEncode
-    plistlib.PlistWriter.writeDict = writeDict
+        if len(bounds) == 1:
+            versions.append(bounds[0])
+            continue
 
+        start = bounds[0].split('.')
+        end = bounds[1].split('.')
+        if len(bounds) != 2 or len(start) != len(end) or start[:-1] != end[:-1] or int(start[-1]) > int(end[-1]):
+            raise UnknownCommandError('A version range can only span the last part of a version number, e.g. 1.2.0..1.2.5')
 
-def we_are_frozen():
-    # All of the modules are built-in to the interpreter, e.g., by py2exe
-    return hasattr(sys, "frozen")
+        prefix = '.'.join(start[:-1])
+        for number in range(int(start[-1]), int(end[-1]) + 1):
+            versions.append(str(number) if prefix == '' else prefix + '.' + str(number))
 
+    return versions
 
-def get_path():
-    if we_are_frozen():
-        return os.path.dirname(sys.executable)
-    return os.path.dirname(__file__)
 
+PARENT_PROJECTS_VARIABLE = 'GRACE_DIZMO_PARENT_PROJECTS'
+
+
+def get_parent_projects():
+    parents = os.environ.get(PARENT_PROJECTS_VARIABLE, '')
+
+    return [parent for parent in parents.split(os.pathsep) if len(parent) > 0]
+
+
+def snapshot_folder(path):
+    snapshot = {}
+
+    if not os.path.isdir(path):
+        return snapshot
 
-def get_plist(config, testname=None, test=False):
-    embedded_bundles = []
-
-    if test:
-        display_name = config['dizmo_settings']['display_name'] + ' ' + testname
-        identifier = config['dizmo_settings']['bundle_identifier'] + '.' + testname.lower()
-    else:
-        display_name = config['dizmo_settings']['display_name']
-        identifier = config['dizmo_settings']['bundle_identifier']
-
-        for index, project in enumerate(config['embedded_projects']):
-            embedded_bundles.append(project['bundle_identifier'])
-
-    plist = dict(
-        BundleDisplayName=display_name,
-        BundleIdentifier=identifier,
-        BundleName=config['dizmo_settings']['bundle_name'],
-        BundleShortVersionString=config['version'],
-        BundleVersion=config['version'],
-        CloseBoxInsetX=config['dizmo_settings']['box_inset_x'],
-        CloseBoxInsetY=config['dizmo_settings']['box_inset_y'],
-        MainHTML=config['dizmo_settings']['main_html'],
-        Width=config['dizmo_settings']['width'],
-        Height=config['dizmo_settings']['height'],
-        ApiVersion=config['dizmo_settings']['api_version'],
-        ElementsVersion=config['dizmo_settings']['elements_version'],
-        Description=config['dizmo_settings']['description'],
-        ChangeLog=config['dizmo_settings']['change_log'],
-        MinSpaceVersion=config['dizmo_settings']['min_space_version'],
-        Tags=config['dizmo_settings']['tags'],
-        Category=config['dizmo_settings']['category'],
-        HiddenDizmo=config['dizmo_settings']['hidden_dizmo'],
-        AllowResize=config['dizmo_settings']['allow_resize'],
-        TitleEditable=config['dizmo_settings']['title_editable'],
-        ForceUpdate=config['dizmo_settings']['force_update']
-    )
-
-    if 'additional_plist_values' in config['dizmo_settings']:
-        keys = config['dizmo_settings']['additional_plist_values']
-        for key, value in keys.items():
-            plist[key] = value
-
-    if config['dizmo_settings']['helper_version'] is not None:
-        plist['HelperVersion'] = config['dizmo_settings']['helper_version']
-
-    if config['dizmo_settings']['elements_version'] is not None:
-        plist['ElementsVersion'] = config['dizmo_settings']['elements_version']
-
-    if config['dizmo_settings']['tree_values'] is not None:
-        if config['dizmo_settings']['tree_values']['attributes'] is not None:
-            plist['Attributes'] = config['dizmo_settings']['tree_values']['attributes']
-
-        if config['dizmo_settings']['tree_values']['private'] is not None:
-            plist['Private'] = config['dizmo_settings']['tree_values']['private']
-
-        if config['dizmo_settings']['tree_values']['public'] is not None:
-            plist['Public'] = config['dizmo_settings']['tree_values']['public']
-
-    if len(embedded_bundles) != 0:
-        plist['EmbeddedBundles'] = embedded_bundles
-
-    return plist
+    for name in os.listdir(path):
+        filepath = os.path.join(path, name)
+        if os.path.isfile(filepath):
+            stat = os.stat(filepath)
+            snapshot[name] = (stat.st_size, stat.st_mtime)
+
+    return snapshot
 
 
 def get_skeleton_names():
@@ -153,6 +115,13 @@ Additional Task Commands
 publish         Publish an uploaded dizmo and make it publicly available.
 publish:display Display the publish status of a dizmo.
 unpublish       Remove a dizmo's publish status and make it unavailable in the store.
+rollback        Restore the previously deployed version of the dizmo.
+watch           Build and deploy the dizmo, then update and redeploy it on every change.
+
+publish and unpublish take an optional version, a list of versions or a
+range of versions: publish:1.2, unpublish:1.0,1.1 or unpublish:1.2.0..1.2.9
+The versions are (un)published for every bundle listed under batch:bundles,
+or for the bundle of the project if none are listed.
 
 Additional Overwrite Commands
 -----------------------------
@@ -160,6 +129,8 @@ dizmo_settings:width
 dizmo_settings:height
 dizmo_settings:allow_resize
 dizmo_settings:title_editable
+batch:bundles   Comma separated list of bundle identifiers
+trace:enabled   Accepts true or false, records the time spent in every stage
 
 Further Reading
 ---------------
@@ -168,55 +139,11 @@ For more information visit: https://www.github.com/mdiener/grace-dizmo
 
 
 class Config(grace.config.Config):
-    def __init__(self):
-        super(Config, self).__init__()
-
-        self._categories = [
-            'books_and_references',
-            'comics',
-            'communication',
-            'education',
-            'entertainment',
-            'finance',
-            'games',
-            'health_and_fitness',
-            'libraries_and_demo',
-            'lifestyle',
-            'media_and_video',
-            'medical',
-            'music_and_audio',
-            'news_and_magazines',
-            'personalization',
-            'photography',
-            'productivity',
-            'shopping',
-            'social',
-            'sports',
-            'tools',
-            'transportation',
-            'travel_and_local',
-            'weather'
-        ]
-
     def _check_update_keys(self, updates):
         if 'dizmo_settings' in updates:
             dizmo_settings = updates['dizmo_settings']
 
-            if ('bundle_name' in dizmo_settings or
-                    'bundle_identifier' in dizmo_settings or
-                    'box_inset_x' in dizmo_settings or
-                    'box_inset_y' in dizmo_settings or
-                    'description' in dizmo_settings or
-                    'tags' in dizmo_settings or
-                    'category' in dizmo_settings or
-                    'min_space_version' in dizmo_settings or
-                    'change_log' in dizmo_settings or
-                    'api_version' in dizmo_settings or
-                    'main_html' in dizmo_settings or
-                    'hidden_dizmo' in dizmo_settings or
-                    'force_update' in dizmo_settings or
-                    'elements_version' in dizmo_settings):
-
+            if len(CONFIG_SCHEMA['dizmo_settings'].fields.locked_keys(dizmo_settings)) > 0:
                 raise KeyNotAllowedError('Only "width", "height", "allow_resize" and "title_editable" are allowed under "dizmo_settings".')
 
             if 'bundle_identifier_subproject' in dizmo_settings:
@@ -263,189 +190,34 @@ class Config(grace.config.Config):
 
         return config
 
-    def _parse_config(self):
-        super(Config, self)._parse_config()
-
-        if 'dizmo_settings' not in self._config:
-            raise MissingKeyError('Could not find settings for dizmo.')
-
-        self._dizmo_config = self._config['dizmo_settings']
-
-        if 'display_name' not in self._dizmo_config:
-            raise MissingKeyError('Specify a display name in your config file under `dizmo_settings`.')
-        else:
-            if not isstring(self._dizmo_config['display_name']):
-                raise WrongFormatError('The display_name key needs to be a string.')
-            else:
-                if len(self._dizmo_config['display_name']) == 0:
-                    raise WrongFormatError('The display_name has to consist of at least one character.')
-
-        if 'bundle_name' not in self._dizmo_config:
-            raise MissingKeyError('Please specify a "bundle_name" under the dizmo_settings key in your project.cfg file.')
-        else:
-            if not isstring(self._dizmo_config['bundle_name']):
-                raise WrongFormatError('The bundle_name key needs to be a string.')
-            else:
-                if len(self._dizmo_config['bundle_name']) == 0:
-                    raise WrongFormatError('The bundle_name needs to be at least one character long.')
-
-        if 'bundle_identifier' not in self._dizmo_config:
-            raise MissingKeyError('Specify a bundle identifier in your config file under `dizmo_settings`.')
-        else:
-            if not isstring(self._dizmo_config['bundle_identifier']):
-                raise WrongFormatError('The bundle_identifier key needs to be a string.')
-            else:
-                if len(self._dizmo_config['bundle_identifier']) == 0:
-                    raise WrongFormatError('The bundle_identifier has to consist of at least one character.')
-
-        if 'width' not in self._dizmo_config:
-            raise MissingKeyError('Specify a width in your config file under `dizmo_settings`.')
-        else:
-            if not isinstance(self._dizmo_config['width'], int):
-                raise WrongFormatError('The width key needs to be a number.')
-
-        if 'height' not in self._dizmo_config:
-            raise MissingKeyError('Specify a height in your config file under `dizmo_settings`.')
-        else:
-            if not isinstance(self._dizmo_config['height'], int):
-                raise WrongFormatError('The height key needs to be a number.')
-
-        if 'box_inset_x' not in self._dizmo_config:
-            raise MissingKeyError('Specify a box inset x in your config file under `dizmo_settings`.')
-        else:
-            if not isinstance(self._dizmo_config['box_inset_x'], int):
-                raise WrongFormatError('The box_inset_x key needs to be a number.')
-
-        if 'box_inset_y' not in self._dizmo_config:
-            raise MissingKeyError('Specify a box inset y in your config file under `dizmo_settings`.')
-        else:
-            if not isinstance(self._dizmo_config['box_inset_y'], int):
-                raise WrongFormatError('The box_inset_y key needs to be a number.')
-
-        if 'description' not in self._dizmo_config:
-            raise MissingKeyError('Add a description in your config file under `dizmo_settings`.')
-        else:
-            if not isstring(self._dizmo_config['description']):
-                raise WrongFormatError('The description needs to be a string.')
-            else:
-                if len(self._dizmo_config['description']) == 0:
-                    raise WrongFormatError('The description has to consist of at least one character.')
-
-        if 'tags' not in self._dizmo_config:
-            raise MissingKeyError('Add a list of tags in your config file under `dizmo_settings`.')
-        else:
-            if not isinstance(self._dizmo_config['tags'], list):
-                raise WrongFormatError('The tags need to be a list ["...", "..."].')
-
-        if 'category' not in self._dizmo_config:
-            raise MissingKeyError('Add a category in your config file under `dizmo_settings`.')
-        else:
-            if not isstring(self._dizmo_config['category']):
-                raise WrongFormatError('The category needs to be a string.')
-            else:
-                if len(self._dizmo_config['category']) == 0:
-                    raise WrongFormatError('The category has to consist of at least one character.')
-                if self._dizmo_config['category'] not in self._categories:
-                    raise WrongFormatError('The category has to be one of the following: "books_and_references", "comics", "communication", "education", "entertainment", "finance", "games", "health_and_fitness", "libraries_and_demo", "lifestyle", "media_and_video", "medical", "music_and_audio", "news_and_magazines", "personalization", "photography", "productivity", "shopping", "social", "sports", "tools", "transportation", "travel_and_local", "weather"')
-
-        if 'min_space_version' not in self._dizmo_config:
-            raise MissingKeyError('Add a min_space_version in your config file under `dizmo_settings`.')
-        else:
-            if not isstring(self._dizmo_config['min_space_version']):
-                raise WrongFormatError('The min_space_version needs to be string.')
-            else:
-                if len(self._dizmo_config['min_space_version']) == 0:
-                    raise WrongFormatError('The min_space_version has to consist of at least one character.')
-
-        if 'change_log' not in self._dizmo_config:
-            raise MissingKeyError('Add a change_log in your config file under `dizmo_settings`.')
-        else:
-            if not isstring(self._dizmo_config['change_log']):
-                raise WrongFormatError('The change_log needs to be string.')
-            else:
-                if len(self._dizmo_config['change_log']) == 0:
-                    raise WrongFormatError('The change_log has to consist of at least one character.')
-
-        if 'api_version' not in self._dizmo_config:
-            raise MissingKeyError('Specify an api version in your config file under `dizmo_settings`.')
-        else:
-            if not isstring(self._dizmo_config['api_version']):
-                raise WrongFormatError('The api_version key needs to be a string.')
-            else:
-                if len(self._dizmo_config['api_version']) == 0:
-                    raise WrongFormatError('The api_version has to consist of at least one character.')
-
-        if 'main_html' not in self._dizmo_config:
-            raise MissingKeyError('Specify a main html in your config file under `dizmo_settings`.')
-        else:
-            if not isstring(self._dizmo_config['main_html']):
-                raise WrongFormatError('The main_html key needs to be a string.')
-            else:
-                if len(self._dizmo_config['main_html']) == 0:
-                    raise WrongFormatError('The main_html has to consist of at least one character.')
-
-        if 'hidden_dizmo' not in self._dizmo_config:
-            self._config['dizmo_settings']['hidden_dizmo'] = False
-        else:
-            if not isinstance(self._dizmo_config['hidden_dizmo'], bool):
-                raise WrongFormatError('The provided value for hidden_dizmo needs to be a boolean.')
-
-        if 'allow_resize' not in self._dizmo_config:
-            self._config['dizmo_settings']['allow_resize'] = False
-        else:
-            if not isinstance(self._dizmo_config['allow_resize'], bool):
-                raise WrongFormatError('The provided value for allow_resize needs to be a boolean')
-
-        if 'title_editable' not in self._dizmo_config:
-            self._config['dizmo_settings']['title_editable'] = True
-        else:
-            if not isinstance(self._dizmo_config['title_editable'], bool):
-                raise WrongFormatError('The provided value for title_editable needs to be a boolean.')
-
-        if 'force_update' not in self._dizmo_config:
-            self._config['dizmo_settings']['force_update'] = False
-        else:
-            if not isinstance(self._dizmo_config['force_update'], bool):
-                raise WrongFormatError('The provided value for force_update needs to be a boolean.')
+    def _load_configurations(self):
+        cwd = os.getcwd()
+        self._cache = ConfigCache(get_cache_path('config.json'))
 
-        if 'elements_version' not in self._dizmo_config:
-            self._config['dizmo_settings']['elements_version'] = None
-
-        if 'helper_version' not in self._dizmo_config:
-            self._config['dizmo_settings']['helper_version'] = None
-
-        if 'attributes' not in self._dizmo_config:
-            self._config['dizmo_settings']['attributes'] = {}
+        sources = [
+            stat_signature(os.path.join(os.path.expanduser('~'), '.grace', 'grace.cfg')),
+            stat_signature(os.path.join(cwd, 'project.cfg'))
+        ]
 
-        if 'private' not in self._dizmo_config:
-            self._config['dizmo_settings']['private'] = {}
+        # Only the parsed config files are cached, the merged config is validated on every run.
+        # Missing config files are reported by grace, there is nothing to cache then.
+        if None in sources:
+            return super(Config, self)._load_configurations()
 
-        if 'public' not in self._dizmo_config:
-            self._config['dizmo_settings']['public'] = {}
+        key = config_digest(cwd, sources)
+        config = self._cache.get('loaded', key)
+        if config is None:
+            config = super(Config, self)._load_configurations()
+            self._cache.set('loaded', key, config)
 
-        if 'tree_values' not in self._dizmo_config:
-            self._config['dizmo_settings']['tree_values'] = None
-        else:
-            if not isinstance(self._dizmo_config['tree_values'], dict):
-                raise WrongFormatError('The provided tree_values key has to be an object.')
+        return config
 
-            if 'attributes' not in self._dizmo_config['tree_values']:
-                self._config['dizmo_settings']['tree_values']['attributes'] = None
-            else:
-                if not isinstance(self._dizmo_config['tree_values']['attributes'], dict):
-                    raise WrongFormatError('The provided attributes key in tree_values has to be an object.')
+    def _parse_config(self):
+        super(Config, self)._parse_config()
 
-            if 'private' not in self._dizmo_config['tree_values']:
-                self._config['dizmo_settings']['tree_values']['private'] = None
-            else:
-                if not isinstance(self._dizmo_config['tree_values']['private'], dict):
-                    raise WrongFormatError('The provided private key in tree_values has to be an object.')
+        raise_errors(CONFIG_SCHEMA.validate(self._config))
 
-            if 'public' not in self._dizmo_config['tree_values']:
-                self._config['dizmo_settings']['tree_values']['public'] = None
-            else:
-                if not isinstance(self._dizmo_config['tree_values']['public'], dict):
-                    raise WrongFormatError('The provided public key in tree_values has to be an object.')
+        self._dizmo_config = self._config['dizmo_settings']
 
 
 class New(grace.create.New):
@@ -457,6 +229,9 @@ class New(grace.create.New):
         self._skeleton_parent_folder = os.path.join(os.path.expanduser('~'), '.grace', 'skeletons', 'custom')
         self._skeleton_path = os.path.join(os.path.expanduser('~'), '.grace', 'skeletons', 'custom', hashlib.md5(skeleton.encode(sys.getfilesystemencoding())).hexdigest())
         self._skeleton_url = skeleton
+        self._skeleton_name = None
+        if skeleton in ['basic', 'joose', 'coffee', 'transcrypt']:
+            self._skeleton_name = skeleton
 
         if skeleton == 'basic':
             self._skeleton_url = 'https://github.com/dizmo/grace-dizmo-skeleton/archive/basic.zip'
@@ -482,6 +257,11 @@ class New(grace.create.New):
         self._copy_structure()
         self._replace_strings()
 
+    def _download_skeleton(self):
+        from .skeletons import SkeletonCache
+
+        SkeletonCache(self._skeleton_url, self._skeleton_path, self._skeleton_name).fetch()
+
 
 class Build(grace.build.Build):
     def __init__(self, config):
@@ -491,70 +271,32 @@ class Build(grace.build.Build):
         help_path = os.path.join(os.getcwd(), 'help')
         path = self._config['build_path']
 
-        super(Build, self).run()
+        with stage('build:grace', path):
+            super(Build, self).run()
 
-        self._copy_images(path)
-        self._build_help(help_path)
+        with stage('build:images'):
+            self._copy_images(path)
+        with stage('build:help'):
+            self._build_help(help_path)
+        with stage('build:plist'):
+            write_plist(self._config, path)
+
+    def _sync_assets(self):
+        source = os.path.join(self._cwd, 'assets')
+        if not os.path.exists(source):
+            return
 
-        plist = get_plist(self._config)
         try:
-            plistlib.writePlist(plist, os.path.join(path, 'Info.plist'))
-        except:
-            raise
-            # raise FileNotWritableError('Could not write plist to target location: ', path)
+            sync_tree(source, os.path.join(self._config['build_path'], 'assets'), get_cache_path(self._config['name'], 'assets.json'))
+        except (IOError, OSError):
+            raise FileNotWritableError('Could not copy all the asset files.')
 
     def _copy_images(self, build_path):
-        assets_path = os.path.join(build_path, 'assets')
-
-        image_PNG_source = os.path.join(os.getcwd(), 'Icon.png')
-        if not os.path.isfile(image_PNG_source):
-            image_PNG_source = os.path.join(assets_path, 'Icon.png')
-
-        image_PNG_dark_source = os.path.join(os.getcwd(), 'Icon-dark.png')
-        if not os.path.isfile(image_PNG_dark_source):
-            image_PNG_dark_source = os.path.join(assets_path, 'Icon-dark.png')
-
-        image_SVG_source = os.path.join(os.getcwd(), 'Icon.svg')
-        if not os.path.isfile(image_SVG_source):
-            image_SVG_source = os.path.join(assets_path, 'Icon.svg')
-
-        image_SVG_dark_source = os.path.join(os.getcwd(), 'Icon-dark.svg')
-        if not os.path.isfile(image_SVG_dark_source):
-            image_SVG_dark_source = os.path.join(assets_path, 'Icon-dark.svg')
-
-        image_preview_source = os.path.join(os.getcwd(), 'Preview.png')
-        if not os.path.isfile(image_preview_source):
-            image_preview_source = os.path.join(assets_path, 'Preview.png')
-
-        if os.path.isfile(image_PNG_source):
-            try:
-                copy(image_PNG_source, os.path.join(build_path, 'Icon.png'))
-            except:
-                print('Could not copy your Icon.png file.')
-
-        if os.path.isfile(image_PNG_dark_source):
-            try:
-                copy(image_PNG_dark_source, os.path.join(build_path, 'Icon-dark.png'))
-            except:
-                print('Could not copy your Icon-dark.png file.')
-
-        if os.path.isfile(image_SVG_source):
-            try:
-                copy(image_SVG_source, os.path.join(build_path, 'Icon.svg'))
-            except:
-                print('Could not copy your Icon.svg file.')
-
-        if os.path.isfile(image_SVG_dark_source):
-            try:
-                copy(image_SVG_dark_source, os.path.join(build_path, 'Icon-dark.svg'))
-            except:
-                print('Could not copy your Icon-dark.svg file.')
+        stage = AssetStage(get_image_assets(build_path), build_path)
 
-        if os.path.isfile(image_preview_source):
-            try:
-                copy(image_preview_source, os.path.join(build_path, 'Preview.png'))
-            except:
-                print('Could not copy your Preview.png file.')
+        for name, state in stage.run():
+            if state == 'failed':
+                print('Could not copy your ' + name + ' file.')
 
     def _build_help(self, help_path):
         valid = False
@@ -574,22 +316,18 @@ class Build(grace.build.Build):
             print('Could not find any help.md file in any language directory under help. Please refer to the dizmo documentation for more information about how to set up the help directory.')
             return
 
-        z = None
-        destination = os.path.join(os.getcwd(), self._config['build_path'], 'help.zip')
+        from .archive import IncrementalZip
+
+        cache_path = get_cache_path(self._config['name'])
+        archive = IncrementalZip(help_path, 'help', os.path.join(cache_path, 'help.zip'), os.path.join(cache_path, 'help.json'))
 
         try:
-            z = zipfile.ZipFile(destination, 'a', zipfile.ZIP_DEFLATED)
-        except RuntimeError as e:
-            z = zipfile.ZipFile(destination, 'a')
-
-        for root, dirs, files in os.walk(help_path):
-            for f in files:
-                tmpfilename = os.path.join(root, f).split(help_path)[1][1:]
-                zipfilename = os.path.join('help', tmpfilename)
-                try:
-                    z.write(os.path.join(root, f), zipfilename)
-                except:
-                    raise FileNotWritableError('Could not write to the zip file.')
+            archive.update()
+            copy_file(os.path.join(cache_path, 'help.zip'), os.path.join(self._config['build_path'], 'help.zip'))
+        except FileNotWritableError:
+            raise
+        except:
+            raise FileNotWritableError('Could not write the help.zip file.')
 
 
 class Test(grace.testit.Test):
@@ -597,30 +335,52 @@ class Test(grace.testit.Test):
         super(Test, self).__init__(config)
 
     def run(self, testname):
-        super(Test, self).run(testname)
-
-        plist = get_plist(self._config, testname, test=True)
         path = os.path.join(os.getcwd(), 'build', self._config['name'] + '_' + testname)
 
-        try:
-            plistlib.writePlist(plist, os.path.join(path, 'Info.plist'))
-        except:
-            raise FileNotWritableError('Could not write plist to target location: ', path)
-
-        icon_name = 'Icon.svg'
-        icon_path = os.path.join(os.getcwd(), 'assets', icon_name)
-        if not os.path.exists(icon_path):
-            icon_path = os.path.join(os.getcwd(), icon_name)
-            if not os.path.exists(icon_path):
-                icon_name = 'Icon.png'
-                icon_path = os.path.join(os.getcwd(), 'assets', icon_name)
-                if not os.path.exists(icon_path):
-                    icon_path = os.path.join(os.getcwd(), icon_name)
-                    if not os.path.exists(icon_path):
-                        print('Could not find an Icon for your test dizmo. It is strongly recommended to add "Icon.svg" in the assets folder.')
+        with stage('test:grace', path, testname=testname):
+            super(Test, self).run(testname)
+
+        with stage('test:plist', testname=testname):
+            write_plist(self._config, path, testname, test=True)
+        with stage('test:icon', testname=testname):
+            self._copy_icon(path, find_test_icon(self._cwd))
+
+    def run_batch(self, testnames, workers=None):
+        icon = find_test_icon(self._cwd)
+        common_path = get_cache_path(self._config['name'], 'tests-common')
+
+        with stage('test:common', common_path):
+            self._clean_previous_tests(common_path)
+            self._build_libraries(common_path)
+            self._build_html(common_path)
+            self._copy_assets(common_path)
+
+        def build(testname):
+            test = Test(self._config)
+            path = os.path.join(self._cwd, 'build', self._config['name'] + '_' + testname)
+
+            with stage('test:batch', path, testname=testname):
+                test._clean_previous_tests(path)
+                test._build_javascript(path, os.path.join(self._cwd, 'test', 'tests', 'test_' + testname + '.js'))
+
+                try:
+                    copy_tree(common_path, path)
+                except (IOError, OSError):
+                    raise FileNotWritableError('Could not copy the test files to: ' + path)
+
+                write_plist(self._config, path, testname, test=True)
+                test._copy_icon(path, icon)
+
+        run_parallel(build, testnames, workers)
+
+    def _copy_icon(self, path, icon):
+        icon_name, icon_path = icon
+        if icon_path is None:
+            print('Could not find an Icon for your test dizmo. It is strongly recommended to add "Icon.svg" in the assets folder.')
+            return
 
         try:
-            copy(icon_path, os.path.join(path, icon_name))
+            copy_file(icon_path, os.path.join(path, icon_name))
         except:
             raise FileNotWritableError('Could not write the icon "' + icon_name + '" to its target location')
 
@@ -629,34 +389,54 @@ class Deploy(grace.deploy.Deploy):
     def __init__(self, config):
         super(Deploy, self).__init__(config)
 
-    def run(self, testname):
-        super(Deploy, self).run(testname)
+    def run(self, testname, delta=None):
+        if delta is None:
+            delta = self._config['deploy']['delta']
+
+        if self._config['test'] and testname is None:
+            super(Deploy, self).run(testname)
+            return
 
         if self._config['test']:
+            name = self._config['name'] + '_' + testname
             dest = os.path.join(self._deployment_path, self._config['dizmo_settings']['bundle_identifier'].lower() + '.' + testname.lower())
-            source = os.path.join(self._deployment_path, self._config['name'] + '_' + testname)
         elif self._config['build']:
+            name = self._config['name']
             dest = os.path.join(self._deployment_path, self._config['dizmo_settings']['bundle_identifier'].lower())
-            source = os.path.join(self._deployment_path, self._config['name'])
         else:
             raise MissingKeyError()
 
-        self._move_deploy(source, dest)
+        if delta and os.path.exists(dest):
+            with stage('deploy:sync', dest):
+                self._sync_deploy(os.path.join(self._cwd, 'build', name), dest)
+            return
+
+        with stage('deploy:copy', os.path.join(self._deployment_path, name)):
+            super(Deploy, self).run(testname)
+        with stage('deploy:swap'):
+            self._move_deploy(os.path.join(self._deployment_path, name), dest)
+
+    def _sync_deploy(self, source, dest):
+        try:
+            stats = sync_tree(source, dest, get_cache_path('deploy', os.path.basename(dest) + '.json'))
+        except (IOError, OSError):
+            raise FileNotWritableError('Could not sync the build directory to the dizmo path.')
+
+        print('Synced the dizmo: ' + str(stats['added']) + ' added, ' + str(stats['modified']) + ' modified, ' + str(stats['removed']) + ' removed.')
 
     def _move_deploy(self, source, dest):
-        if os.path.exists(dest):
-            try:
-                rmtree(dest)
-            except:
-                raise RemoveFolderError('Could not remove the deploy folder.')
-        else:
+        if not os.path.exists(dest):
             print('The dizmo will be deployed, but you need to drag & drop the folder "' + self._config['name'] + '" from the build directory into dizmospace once to allow association with it. Otherwise your dizmo will not show up as installed.')
 
         try:
-            move(source, dest)
+            swap_folder(source, dest)
         except:
             raise FileNotWritableError('Could not move the deploy target to the dizmo path.')
 
+    def rollback(self):
+        dest = os.path.join(self._deployment_path, self._config['dizmo_settings']['bundle_identifier'].lower())
+        rollback_folder(dest)
+
 
 class Zip(grace.zipit.Zip):
     def __init__(self, config):
@@ -665,6 +445,32 @@ class Zip(grace.zipit.Zip):
         if 'zip_name' not in self._config:
             self._zip_name = self._config['name'] + '-' + self._config['version'] + '.dzm'
 
+    def run(self, testname):
+        self._written = None
+        super(Zip, self).run(testname)
+
+    def _zip(self, name, source, dest):
+        from .archive import DeterministicZip
+
+        # zip_path can point to the build folder, where the archive has already been written.
+        if self._written is not None and os.path.abspath(dest) == os.path.abspath(self._written):
+            return
+
+        self._cleanup(dest)
+
+        # The archive is deterministic, so a second destination gets a copy of the first one.
+        if self._written is not None:
+            with stage('zip:copy', dest):
+                try:
+                    copy2(self._written, dest)
+                except:
+                    raise FileNotWritableError('Could not write to the zip file.')
+            return
+
+        with stage('zip:archive', dest):
+            DeterministicZip(source, name).write(dest)
+        self._written = dest
+
 
 class Upload(grace.upload.Upload):
     def __init__(self, config):
@@ -679,12 +485,14 @@ class Upload(grace.upload.Upload):
 
         super(Upload, self).__init__(config)
 
+        from .store import get_store_client
+
+        self._client = get_store_client(self._config)
         self._dizmo_id = self._config['dizmo_settings']['bundle_identifier']
         self._version = self._config['version']
-        self._publish_latest_url = self._base_url + '/dizmo/' + self._dizmo_id + '/publish/latest'
-        self._login_url = self._base_url + '/oauth/login'
-        self._upload_url = self._base_url + '/dizmo'
-        self._upload_url_existing = self._base_url + '/dizmo/' + self._dizmo_id
+        self._publish_latest_url = self._client.url('dizmo', self._dizmo_id, 'publish', 'latest')
+        self._upload_url = self._client.url('dizmo')
+        self._upload_url_existing = self._client.url('dizmo', self._dizmo_id)
 
         if 'zip_name' not in self._config:
             self._zip_name = self._config['name'] + '-' + self._config['version'] + '.dzm'
@@ -702,13 +510,33 @@ class Upload(grace.upload.Upload):
             'password': self._password
         }
 
+    def _login(self, use_session_cache=True):
+        self._session_cached = use_session_cache and self._client.restore_session(self._username)
+        if self._session_cached:
+            self._check_dizmo_exists()
+            return
+
+        data = self._get_login_information()
+
+        r = self._client.login(data['username'], data['password'])
+
+        self._login_response(r)
+
     def _login_response(self, r):
         if r.status_code == 401 or r.status_code == 403:
             raise WrongLoginCredentials('Could not log in with the given credentials.')
 
-        r = requests.get(self._publish_latest_url,
-            cookies=self._cookies,
-            verify=self._verify_ssl)
+        if 200 <= r.status_code < 300:
+            self._client.save_session(self._username)
+        self._check_dizmo_exists()
+
+    def _check_dizmo_exists(self):
+        r = self._client.get(self._publish_latest_url)
+
+        if r.status_code == 401 and self._session_cached:
+            self._client.forget_session(self._username)
+            self._login(False)
+            return
 
         self._dizmo_exist_check_response(r)
 
@@ -718,33 +546,69 @@ class Upload(grace.upload.Upload):
             return
 
         if r.status_code == 200:
+            if self._config['store']['skip_unchanged'] and self._bundle_unchanged(r):
+                print('The store already has an identical bundle for version ' + self._version + ', skipping the upload.')
+                return
+
             self._upload_existing()
             return
 
         response = load_json(r.text)
         raise RemoteServerError('Error from store server (' + self._base_url + '): ' + response['errormessage'] + ' - Error Nr.: ' + str(response['errornumber']))
 
-    def _upload_existing(self):
-        if not os.path.exists(self._zip_path):
-            raise FileNotFoundError('Could not find the zip file. Please check if "' + self._zip_path + '" exists.')
+    def _bundle_unchanged(self, r):
+        from .store import UploadRecord, find_remote_digest
+
+        if not os.path.isfile(self._zip_path):
+            return False
 
         try:
-            zip_file = open(self._zip_path, 'r')
-        except:
-            raise GeneralError('Something went wrong while opening the zip file. Please try again.')
+            latest = load_json(r.text)
+        except ValueError:
+            return False
+
+        if not isinstance(latest, dict):
+            return False
+
+        remote = find_remote_digest(latest)
+        if remote is not None:
+            algorithm, digest = remote
+            return file_digest(self._zip_path, algorithm=algorithm) == digest
+
+        # The store does not report a digest, fall back to what was uploaded from here before.
+        if str(latest.get('version')) != self._version:
+            return False
+
+        return UploadRecord().get(self._base_url, self._dizmo_id, self._version) == file_digest(self._zip_path)
+
+    def _upload(self):
+        self._upload_bundle('post', self._upload_url)
+
+    def _upload_existing(self):
+        self._upload_bundle('put', self._upload_url_existing)
+
+    def _upload_bundle(self, method, url):
+        from .store import BundleUploader
 
-        r = requests.put(self._upload_url_existing,
-            files={'file': zip_file},
-            cookies=self._cookies,
-            verify=self._verify_ssl
+        uploader = BundleUploader(self._zip_path, self._client,
+            chunk_size=self._config['store']['chunk_size'],
+            resumable=self._config['store']['resumable_upload']
         )
 
-        self._upload_response(r)
+        self._upload_response(uploader.upload(method, url))
 
     def _upload_response(self, r):
+        from .store import UploadRecord
+
         if r.status_code != 200 and r.status_code != 201:
-            response = load_json(r.text)
-            raise RemoteServerError('Error from store server (' + self._base_url + '): ' + response['errormessage'] + ' - Error Nr.: ' + str(response['errornumber']))
+            try:
+                response = load_json(r.text)
+                message = response['errormessage'] + ' - Error Nr.: ' + str(response['errornumber'])
+            except (ValueError, KeyError, TypeError):
+                message = 'HTTP ' + str(r.status_code)
+            raise RemoteServerError('Error from store server (' + self._base_url + '): ' + message)
+
+        UploadRecord().set(self._base_url, self._dizmo_id, self._version, file_digest(self._zip_path))
 
 
 class Lint(grace.lint.Lint):
@@ -763,13 +627,99 @@ class Lint(grace.lint.Lint):
 
         super(Lint, self).__init__(config)
 
+    def run(self):
+        if self._check_executable('nodejs'):
+            self._options['node'] = 'nodejs'
+        elif self._check_executable('node'):
+            self._options['node'] = 'node'
+        else:
+            raise NoExectuableError('Could not find a node js executable on the system.')
+
+        if not os.path.exists(os.path.join(self._cwd, 'src')):
+            raise FolderNotFoundError('Could not find the source folder for the project.')
+
+        files = self._find_files()
+
+        if 'jslint' in self._options:
+            script = self._get_jslint()
+        else:
+            script = self._get_jshint()
+
+        try:
+            results = self._lint_files(files, script.name)
+        finally:
+            script.close()
+
+        self.lint_valid = True
+        for valid, output in results:
+            sys.stdout.write(output)
+            if not valid:
+                self.lint_valid = False
+
+        sys.stdout.flush()
+
+    def _find_files(self):
+        files = []
+
+        application = os.path.join('src', 'application.js')
+        if os.path.exists(application):
+            files.append(application)
+
+        for dirname, subdirs, filenames in os.walk(os.path.join('src', 'javascript')):
+            for filename in sorted(filenames):
+                path = os.path.join(dirname, filename)
+                if os.path.splitext(filename)[1] == '.js' and path not in self._options.get('ignore', []):
+                    files.append(path)
+
+        return files
+
+    def _lint_files(self, files, script):
+        manifest_path = get_cache_path('lint.json')
+        manifest = {}
+        if self._config['lint']['cache']:
+            manifest = load_manifest(manifest_path)
+
+        # The script contains the effective options (with the dizmo predefs), the library is updated once a day.
+        library = self._options['jslint' if 'jslint' in self._options else 'jshint']
+        options = [file_digest(script), file_digest(library) if os.path.isfile(library) else '', self._options['node']]
+
+        keys = {}
+        results = {}
+        pending = []
+        for path in files:
+            keys[path] = tree_digest({}, file_digest(path), *options)
+
+            entry = manifest.get(path)
+            if entry is not None and entry.get('key') == keys[path]:
+                results[path] = (entry['valid'], entry['output'])
+            else:
+                pending.append(path)
+
+        for path, result in zip(pending, run_parallel(lambda path: self._lint_output(script, path), pending, self._config['lint']['workers'])):
+            results[path] = result
+
+        if self._config['lint']['cache']:
+            write_manifest(manifest_path, dict((path, {
+                'key': keys[path],
+                'valid': results[path][0],
+                'output': results[path][1]
+            }) for path in files))
+
+        return [results[path] for path in files]
+
+    def _lint_output(self, script, path):
+        process = subprocess.Popen([self._options['node'], script, path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0].decode('utf-8', 'replace')
+
+        return process.returncode == 0, output
+
 
 class Task(grace.task.Task):
     def __init__(self, task, config, module, test_cases):
-        self._available_tasks = ['publish', 'unpublish']
+        self._available_tasks = ['publish', 'unpublish', 'rollback', 'watch']
         self._task = task
         self._subtask = ''
-        self._verify_ssl = False
+        self._pending_tests = None
 
         try:
             super(Task, self).__init__(task, config, module, test_cases)
@@ -781,25 +731,174 @@ class Task(grace.task.Task):
                     raise UnknownCommandError('The provided argument(s) could not be recognized by the manage.py script: ' + self._task)
                 else:
                     if task[1] != 'display':
-                        pattern = re.compile('^([0-9]+\.?)*[0-9]+$')
-                        if not pattern.match(task[1]):
-                            raise UnknownCommandError('The provided sub-argument for the task could not be recognized. Use either "display" or a version number (0.2, 1.5, etc.)')
+                        expand_versions(task[1])
 
                     self._task = task[0]
                     self._subtask = task[1]
 
     def execute(self):
+        # Sub projects are traced into the file their parent passes on and merged into its trace.
+        path = os.environ.get(TRACE_VARIABLE)
+        summary = path is None
+
+        if path is None and self._config['trace']['enabled']:
+            path = os.path.join(os.getcwd(), self._config['trace']['path'])
+
+        if path is None:
+            self._execute_task()
+            return
+
+        tracer = start_tracing(self._config['name'])
+        try:
+            with tracer.stage('manage.py ' + self._task):
+                self._execute_task()
+        finally:
+            stop_tracing()
+
+            # A trace that can not be written must not hide the error of the task itself.
+            try:
+                tracer.write(path)
+                written = True
+            except (IOError, OSError):
+                print('Could not write the trace to: ' + path)
+                written = False
+
+            if summary:
+                print('\n' + tracer.summary())
+                if written:
+                    print('\nWrote the trace to ' + path + ', open it in chrome://tracing or https://ui.perfetto.dev.')
+
+    def _execute_task(self):
         if self._task not in self._available_tasks:
             super(Task, self).execute()
             return
 
+        if self._task == 'rollback':
+            Deploy(self._config).rollback()
+            print('Successfully rolled back to the previously deployed version.')
+            return
+
+        if self._task == 'watch':
+            self._watch()
+            return
+
         self._check_config()
 
-        self._publish_url = self._base_url + '/dizmo/' + self._dizmo_id + '/publish'
-        self._login_url = self._base_url + '/oauth/login'
+        from .store import get_store_client
+
+        self._client = get_store_client(self._config)
+        self._publish_url = self._client.url('dizmo', self._dizmo_id, 'publish')
 
         self._login()
 
+    def exec_build(self, silent=False):
+        with stage('build', self._config['build_path']):
+            super(Task, self).exec_build(silent)
+
+    def exec_deploy(self, testname, silent=False):
+        with stage('deploy', testname=testname):
+            super(Task, self).exec_deploy(testname, silent)
+
+    def exec_zip(self, testname, silent=False):
+        with stage('zip', testname=testname):
+            super(Task, self).exec_zip(testname, silent)
+
+    def exec_upload(self, silent=False):
+        with stage('upload'):
+            super(Task, self).exec_upload(silent)
+
+    def exec_lint(self, silent=False):
+        with stage('lint'):
+            return super(Task, self).exec_lint(silent)
+
+    def exec_test(self, testname, silent=False):
+        with stage('test', testname=testname):
+            self._exec_test(testname, silent)
+
+    def _exec_test(self, testname, silent=False):
+        if self._pending_tests is None and self._test_cases is not None and len(self._test_cases) > 1 and testname in self._test_cases:
+            Test(self._config).run_batch(self._test_cases)
+            self._pending_tests = set(self._test_cases)
+
+        if self._pending_tests is not None and testname in self._pending_tests:
+            self._pending_tests.remove(testname)
+
+            if not silent:
+                print('Successfully built the test: ' + testname + '.')
+            return
+
+        super(Task, self).exec_test(testname, silent)
+
+    def _watch(self):
+        from .watch import watch
+
+        self._config['build'] = True
+        self._config['test'] = False
+        self._watch_lock = threading.Lock()
+
+        # grace does not hand the overwrites to the task, a reloaded config needs them again.
+        self._overwrites = CommandLineParser().get_arguments()[2]
+
+        self._run_stages(set(['build']))
+
+        print('Watching the project for any changes ... (Hit Ctrl+c to exit)\n')
+        observer = watch(os.getcwd(), self._run_stages, self._config['watch']['debounce'])
+
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            observer.stop()
+
+        observer.join()
+
+    def _run_stages(self, stages):
+        with self._watch_lock:
+            try:
+                self._execute_stages(stages)
+            except Error as e:
+                print(e.msg)
+
+    def _execute_stages(self, stages):
+        if 'config' in stages:
+            self._reload_config()
+            stages.add('build')
+
+        build = Build(self._config)
+        build_path = self._config['build_path']
+
+        if 'build' in stages or not os.path.exists(build_path):
+            if self._config['autolint']:
+                valid = self.exec_lint(True)
+                if not valid:
+                    print('The JavaScript could not be linted and therefore no building/deploying will happen.')
+                    return
+
+            build.run()
+            print('Successfully built the project.')
+        else:
+            if 'assets' in stages:
+                build._sync_assets()
+            if 'assets' in stages or 'images' in stages:
+                build._copy_images(build_path)
+            if 'help' in stages:
+                build._build_help(os.path.join(os.getcwd(), 'help'))
+
+            print('Successfully updated the ' + ', '.join(sorted(stages)) + ' of the project.')
+
+        Deploy(self._config).run(None, delta=True)
+
+    def _reload_config(self):
+        config = Config()
+        config.load_overwrites(deepcopy(self._overwrites))
+        config = config.get_config()
+        config['build'] = True
+        config['test'] = False
+
+        self._config.clear()
+        self._config.update(config)
+        print('Reloaded the project configuration.')
+
     def _check_config(self):
         if 'bundle_identifier' not in self._config['dizmo_settings']:
             raise MissingKeyError('Your bundle_identifier must be provided in the config file.')
@@ -828,12 +927,218 @@ class Task(grace.task.Task):
             if 'password' in self._config['credentials']:
                 self._password = self._config['credentials']['password']
 
-    def _execute_subproject(self, project):
-        if 'bundle_identifier' not in project:
-            print('Not building sub project located at "' + project['source']['url'] + '" as the bundle_identifier is missing.')
+    def _build_subprojects(self):
+        if not self._build and not self._autodeploy:
+            return
+
+        parents = get_parent_projects()
+        projects = []
+        for project in self._config['embedded_projects']:
+            if 'source' not in project:
+                continue
+
+            if 'bundle_identifier' not in project:
+                print('Not building sub project located at "' + project['source']['url'] + '" as the bundle_identifier is missing.')
+                continue
+
+            if project['source']['url'] in parents:
+                print('Not building sub project located at "' + project['source']['url'] + '" as it is already being built by a parent project.')
+                continue
+
+            projects.append(project)
+
+        if len(projects) == 0:
             return
 
-        super(Task, self)._execute_subproject(project)
+        self._subproject_lock = threading.Lock()
+        self._subproject_processes = []
+        self._subproject_outputs = {}
+        self._subproject_failed = False
+
+        # Sub projects sharing a destination are built one after the other, otherwise their outputs get mixed up.
+        self._destination_locks = dict((os.path.abspath(project['destination']), threading.Lock()) for project in projects)
+
+        manifest_path = get_cache_path('subprojects.json')
+        self._subproject_manifest = {}
+        if self._config['subprojects']['incremental']:
+            self._subproject_manifest = load_manifest(manifest_path)
+
+        with stage('subprojects'):
+            results = run_parallel(self._run_subproject, projects, self._config['subprojects']['workers'])
+
+        if self._config['subprojects']['incremental']:
+            write_manifest(manifest_path, self._subproject_manifest)
+
+        failures = []
+        for result in results:
+            if result['state'] == 'failed':
+                failures.append(result)
+            if len(result['output'].strip()) > 0:
+                print('Output of sub-project located at: ' + result['url'])
+                print(result['output'].rstrip())
+
+        print('')
+
+        if len(failures) > 0:
+            cancelled = len([result for result in results if result['state'] == 'cancelled'])
+            report = 'Could not build ' + str(len(failures)) + ' of ' + str(len(results)) + ' sub projects (' + str(cancelled) + ' cancelled):'
+            for result in failures:
+                report += '\n\n' + result['url'] + '\n' + result['error'].rstrip()
+            raise SubProjectError(report)
+
+    def _run_subproject(self, project):
+        destination = os.path.abspath(project['destination'])
+
+        with self._destination_locks[destination]:
+            with stage('subproject ' + project['source']['url'], destination):
+                return self._trace_subproject(project)
+
+    def _trace_subproject(self, project):
+        destination = os.path.abspath(project['destination'])
+        result = {
+            'url': project['source']['url'],
+            'state': 'built',
+            'output': '',
+            'error': ''
+        }
+
+        if self._subproject_failed:
+            result['state'] = 'cancelled'
+            return result
+
+        key = project['source']['url'] + '\n' + destination
+        fingerprint = None
+        files = None
+
+        if self._config['subprojects']['incremental']:
+            fingerprint, files = self._fingerprint_subproject(project, key)
+            if fingerprint is not None and self._subproject_up_to_date(key, destination, fingerprint):
+                print('Sub-project located at ' + project['source']['url'] + ' is up to date.')
+                result['state'] = 'unchanged'
+                return result
+
+        before = snapshot_folder(destination)
+
+        try:
+            self._execute_subproject(project)
+        except Error as e:
+            result['state'] = 'failed'
+            result['error'] = e.msg
+        except Exception as e:
+            result['state'] = 'failed'
+            result['error'] = str(e)
+
+        if destination in self._subproject_outputs:
+            result['output'], error = self._subproject_outputs[destination]
+            if result['state'] == 'failed':
+                result['error'] = error
+
+        if result['state'] == 'failed':
+            if self._subproject_failed:
+                result['state'] = 'cancelled'
+            else:
+                self._cancel_subprojects()
+        elif fingerprint is not None:
+            after = snapshot_folder(destination)
+            outputs = dict((name, after[name][0]) for name in after if before.get(name) != after[name])
+
+            with self._subproject_lock:
+                self._subproject_manifest[key] = {
+                    'fingerprint': fingerprint,
+                    'files': files,
+                    'outputs': outputs
+                }
+
+        return result
+
+    def _fingerprint_subproject(self, project, key):
+        source = project['source']
+        previous = self._subproject_manifest.get(key, {})
+        extra = [self._gather_option_string(project)]
+
+        global_config = os.path.join(os.path.expanduser('~'), '.grace', 'grace.cfg')
+        if os.path.isfile(global_config):
+            extra.append(file_digest(global_config))
+
+        if source['type'] == 'file':
+            files = scan_tree(source['url'], previous.get('files'), exclude=['build', '.git'])
+            return tree_digest(files, *extra), files
+
+        if source['type'] == 'git':
+            try:
+                process = subprocess.Popen(['git', 'ls-remote', source['url'], source['branch']], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                output, error = process.communicate()
+            except OSError:
+                return None, None
+
+            output = output.decode('utf-8', 'replace').split()
+            if process.returncode != 0 or len(output) == 0:
+                return None, None
+
+            return tree_digest({}, output[0], source['branch'], *extra), None
+
+        return None, None
+
+    def _subproject_up_to_date(self, key, destination, fingerprint):
+        previous = self._subproject_manifest.get(key)
+        if previous is None or previous['fingerprint'] != fingerprint or len(previous['outputs']) == 0:
+            return False
+
+        current = snapshot_folder(destination)
+        for name, size in previous['outputs'].items():
+            if name not in current or current[name][0] != size:
+                return False
+
+        return True
+
+    def _cancel_subprojects(self):
+        with self._subproject_lock:
+            self._subproject_failed = True
+            for process in self._subproject_processes:
+                if process.poll() is None:
+                    process.terminate()
+
+    def _build_subproject(self, path, destination, options):
+        path = os.path.abspath(path)
+        destination = os.path.abspath(destination)
+        args = [sys.executable, 'manage.py', 'zip'] + shlex.split(options) + ['-o', 'zip_path=' + destination]
+
+        if not os.path.exists(destination):
+            os.makedirs(destination)
+
+        env = dict(os.environ)
+        env[PARENT_PROJECTS_VARIABLE] = os.pathsep.join(get_parent_projects() + [os.getcwd()])
+
+        tracer = get_tracer()
+        trace_path = None
+        if tracer is not None:
+            trace_path = get_cache_path('trace', hashlib.sha1(destination.encode('utf-8')).hexdigest() + '.json')
+            if os.path.exists(trace_path):
+                os.remove(trace_path)
+            env[TRACE_VARIABLE] = trace_path
+
+        with self._subproject_lock:
+            if self._subproject_failed:
+                raise SubProjectError('Cancelled the build of the sub project at location: "' + path + '".')
+
+            try:
+                process = subprocess.Popen(args, cwd=path, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            except OSError:
+                raise SubProjectError('Could not execute the sub project at location: "' + path + '". Pleas try again.')
+
+            self._subproject_processes.append(process)
+
+        output, error = process.communicate()
+        output = output.decode('utf-8', 'replace')
+        error = error.decode('utf-8', 'replace')
+
+        if trace_path is not None:
+            tracer.merge(trace_path)
+
+        self._subproject_outputs[destination] = (output, error)
+
+        if process.returncode != 0 or error != '':
+            raise SubProjectError('Could not execute the sub project at location: "' + path + '". Pleas try again.')
 
     def _gather_option_string(self, project):
         string = super(Task, self)._gather_option_string(project)
@@ -842,23 +1147,19 @@ class Task(grace.task.Task):
 
         return string
 
-    def _login(self):
+    def _login(self, use_session_cache=True):
+        self._session_cached = use_session_cache and self._client.restore_session(self._username)
+        if self._session_cached:
+            self._execute_store_task()
+            return
+
         if self._username is None:
             self._username = input('Please provide the username for your upload server (or leave blank if none is required): ')
 
         if self._password is None:
             self._password = getpass.getpass('Please provide the password for your upload server (or leave blank if none is required): ')
 
-        data = {
-            'username': self._username,
-            'password': self._password
-        }
-
-        r = requests.post(self._login_url,
-            data=write_json(data),
-            headers={'Content-type': 'application/json'},
-            verify=self._verify_ssl
-        )
+        r = self._client.login(self._username, self._password)
 
         self._login_response(r)
 
@@ -866,7 +1167,15 @@ class Task(grace.task.Task):
         if r.status_code != 200:
             raise WrongLoginCredentials('Could not log in with the given credentials.')
 
-        self._cookies = r.cookies
+        self._client.save_session(self._username)
+        self._execute_store_task()
+
+    def _execute_store_task(self):
+        bundles = self._config['batch']['bundles']
+        if len(bundles) > 0 or ',' in self._subtask or '..' in self._subtask:
+            if self._subtask != 'display':
+                self._execute_batch(bundles)
+                return
 
         if self._task == 'publish':
             if self._subtask == 'display':
@@ -893,23 +1202,153 @@ class Task(grace.task.Task):
         self._execute_publish(False, version)
 
     def _execute_publish(self, state, version):
-        r = requests.put(self._publish_url + '/' + version,
+        r = self._client.put(self._publish_url + '/' + version,
             data=write_json({'publish': state}),
-            headers={'Content-Type': 'application/json'},
-            cookies=self._cookies,
-            verify=self._verify_ssl
+            headers={'Content-Type': 'application/json'}
         )
 
         self._display_response(r)
 
+    def _execute_batch(self, bundles):
+        if len(bundles) == 0:
+            bundles = [self._dizmo_id]
+
+        if self._subtask == '':
+            versions = [self._config['version']]
+        else:
+            versions = expand_versions(self._subtask)
+
+        state = self._task == 'publish'
+        jobs = [(bundle, version) for bundle in bundles for version in versions]
+
+        print(('Publishing ' if state else 'Unpublishing ') + str(len(jobs)) + ' dizmo version(s) of ' + str(len(bundles)) + ' bundle(s).')
+
+        data = write_json({'publish': state})
+        responses = self._store_requests('PUT', [
+            (self._client.url('dizmo', bundle, 'publish', version), {'data': data, 'headers': {'Content-Type': 'application/json'}})
+            for bundle, version in jobs
+        ])
+
+        results = [self._batch_result(bundle, version, r) for (bundle, version), r in zip(jobs, responses)]
+
+        if self._session_cached and any(status == 401 for bundle, version, status, message in results):
+            self._client.forget_session(self._username)
+            self._login(False)
+            return
+
+        print(format_table(['Bundle', 'Version', 'Result'], [[bundle, version, message] for bundle, version, status, message in results]))
+
+        failed = len([status for bundle, version, status, message in results if status != 200])
+        if failed > 0:
+            raise RemoteServerError(str(failed) + ' of ' + str(len(results)) + ' requests to the store server (' + self._base_url + ') failed.')
+
+    def _store_requests(self, method, calls):
+        def execute(call):
+            url, kwargs = call
+            try:
+                return self._client.request(method, url, **kwargs)
+            except RemoteServerError as e:
+                return e
+
+        return run_parallel(execute, calls, self._config['store']['concurrency'])
+
+    def _batch_result(self, bundle, version, r):
+        if isinstance(r, RemoteServerError):
+            return bundle, version, None, r.msg
+
+        if r.status_code == 200:
+            return bundle, version, r.status_code, 'ok'
+
+        return bundle, version, r.status_code, self._error_message(r)
+
+    def _error_message(self, r):
+        try:
+            response = load_json(r.text)
+            return response['errormessage'] + ' - Error Nr.: ' + str(response['errornumber'])
+        except:
+            return 'HTTP ' + str(r.status_code)
+
     def _access_publish_information(self):
-        r = requests.get(self._publish_url,
-            cookies=self._cookies,
-            verify=self._verify_ssl)
+        bundles = self._display_bundles()
+        if len(bundles) > 1:
+            self._display_dashboard(bundles)
+            return
+
+        r = self._client.get(self._publish_url)
 
         self._display_response(r)
 
+    def _display_bundles(self):
+        bundles = list(self._config['batch']['bundles'])
+        if len(bundles) == 0:
+            bundles = [self._dizmo_id] + [project['bundle_identifier'] for project in self._config['embedded_projects']]
+
+        unique = []
+        for bundle in bundles:
+            if bundle not in unique:
+                unique.append(bundle)
+
+        return unique
+
+    def _display_dashboard(self, bundles):
+        from .store import PublishStatusCache, summarize_publish_information
+
+        cache = PublishStatusCache(get_cache_path('publish_status.json'), self._config['display']['cache_lifetime'])
+        results = {}
+
+        for bundle in bundles:
+            cached = cache.get(self._base_url, bundle)
+            if cached is not None:
+                results[bundle] = cached
+
+        missing = [bundle for bundle in bundles if bundle not in results]
+        responses = self._store_requests('GET', [(self._client.url('dizmo', bundle, 'publish'), {}) for bundle in missing])
+
+        if self._session_cached and any(not isinstance(r, RemoteServerError) and r.status_code == 401 for r in responses):
+            self._client.forget_session(self._username)
+            self._login(False)
+            return
+
+        fetched = {}
+        for bundle, r in zip(missing, responses):
+            if isinstance(r, RemoteServerError):
+                results[bundle] = {'status': None, 'error': r.msg}
+                continue
+
+            if r.status_code != 200:
+                results[bundle] = {'status': r.status_code, 'error': self._error_message(r)}
+                continue
+
+            try:
+                data = load_json(r.text)
+            except ValueError:
+                data = r.text
+
+            results[bundle] = fetched[bundle] = {'status': r.status_code, 'data': data}
+
+        cache.update(self._base_url, fetched)
+
+        if self._config['display']['format'] == 'json':
+            print(write_json(dict((bundle, results[bundle]) for bundle in bundles)))
+            return
+
+        rows = []
+        for bundle in bundles:
+            result = results[bundle]
+            if 'error' in result:
+                rows.append([bundle, '', '', result['error']])
+            else:
+                latest, published = summarize_publish_information(result['data'])
+                rows.append([bundle, latest, published, 'ok'])
+
+        print(format_table(['Bundle', 'Latest', 'Published', 'Status'], rows))
+
     def _display_response(self, r):
+        if r.status_code == 401 and self._session_cached:
+            self._client.forget_session(self._username)
+            self._login(False)
+            return
+
         if r.status_code == 200:
             if self._task == 'publish':
                 if self._subtask == 'display':
@@ -0,0 +1,381 @@
+from __future__ import absolute_import
+from builtins import object
+import os
+from copy import deepcopy
+from grace.error import MissingKeyError, WrongFormatError
+from grace.utils import isstring
+
+
+NO_DEFAULT = object()
+STRING = 'string'
+NUMBER = (int, float)
+
+CATEGORIES = (
+    'books_and_references',
+    'comics',
+    'communication',
+    'education',
+    'entertainment',
+    'finance',
+    'games',
+    'health_and_fitness',
+    'libraries_and_demo',
+    'lifestyle',
+    'media_and_video',
+    'medical',
+    'music_and_audio',
+    'news_and_magazines',
+    'personalization',
+    'photography',
+    'productivity',
+    'shopping',
+    'social',
+    'sports',
+    'tools',
+    'transportation',
+    'travel_and_local',
+    'weather'
+)
+
+
+class Field(object):
+    def __init__(self, name, types=None, required=False, default=NO_DEFAULT, nullable=False, min_length=None,
+                 choices=None, check=None, coerce=None, items=None, fields=None, locked=False,
+                 missing=None, wrong_type=None, too_short=None, not_allowed=None, invalid=None):
+        self.name = name
+        self.required = required
+        self.default = default
+        self.nullable = nullable
+        self.min_length = min_length
+        self.choices = frozenset(choices) if choices is not None else None
+        self.check = check
+        self.coerce = coerce
+        self.items = items
+        self.fields = Schema(fields) if fields is not None else None
+        self.locked = locked
+
+        self.missing = missing
+        self.wrong_type = wrong_type
+        self.too_short = too_short
+        self.not_allowed = not_allowed
+        self.invalid = invalid
+
+        self._is_string = types == STRING
+        self._types = None if types is None or self._is_string else types
+        # bool is a subclass of int, true must not pass as a number.
+        self._allows_bool = types is bool or (isinstance(types, tuple) and bool in types)
+        self._mutable_default = isinstance(default, (dict, list))
+
+    def get_default(self):
+        if self._mutable_default:
+            return deepcopy(self.default)
+        return self.default
+
+    def validate(self, value, errors):
+        if value is None and self.nullable:
+            return
+
+        if self._is_string:
+            if not isstring(value):
+                errors.append((WrongFormatError, self.wrong_type))
+                return
+        elif self._types is not None and (not isinstance(value, self._types) or (isinstance(value, bool) and not self._allows_bool)):
+            errors.append((WrongFormatError, self.wrong_type))
+            return
+
+        if self.min_length is not None and len(value) < self.min_length:
+            errors.append((WrongFormatError, self.too_short))
+            return
+
+        if self.choices is not None and value not in self.choices:
+            errors.append((WrongFormatError, self.not_allowed))
+            return
+
+        if self.check is not None and not self.check(value):
+            errors.append((WrongFormatError, self.invalid))
+            return
+
+        if self.items is not None:
+            for item in value:
+                item_errors = []
+                self.items.validate(item, item_errors)
+                if len(item_errors) > 0:
+                    errors.append(item_errors[0])
+                    return
+
+        if self.fields is not None:
+            self.fields.validate(value, errors)
+
+
+class Schema(object):
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._fields = dict((field.name, field) for field in self.fields)
+
+    def __contains__(self, name):
+        return name in self._fields
+
+    def __getitem__(self, name):
+        return self._fields[name]
+
+    def validate(self, data, errors=None):
+        if errors is None:
+            errors = []
+
+        for field in self.fields:
+            if field.name not in data:
+                if field.required:
+                    errors.append((MissingKeyError, field.missing))
+                elif field.default is not NO_DEFAULT:
+                    data[field.name] = field.get_default()
+                    if field.fields is not None and isinstance(data[field.name], dict):
+                        field.fields.validate(data[field.name], errors)
+                continue
+
+            if field.coerce is not None:
+                data[field.name] = field.coerce(data[field.name])
+
+            field.validate(data[field.name], errors)
+
+        return errors
+
+    def locked_keys(self, data):
+        return [key for key in data if key in self._fields and self._fields[key].locked]
+
+
+def raise_errors(errors):
+    if len(errors) == 0:
+        return
+
+    raise errors[0][0]('\n'.join(message for error, message in errors))
+
+
+def split_list(value):
+    if isstring(value):
+        return [entry.strip() for entry in value.split(',') if len(entry.strip()) > 0]
+    return value
+
+
+# Nested values overwritten on the command line (-o store:concurrency=8) are not parsed by grace and arrive as strings.
+def parse_bool(value):
+    if isstring(value) and value.lower() in ['true', 'false']:
+        return value.lower() == 'true'
+    return value
+
+
+def parse_number(value):
+    if not isstring(value):
+        return value
+
+    for number in [int, float]:
+        try:
+            return number(value)
+        except ValueError:
+            pass
+
+    return value
+
+
+def required_string(name, missing, wrong_type, too_short, **kwargs):
+    return Field(name, STRING, required=True, min_length=1, missing=missing, wrong_type=wrong_type, too_short=too_short, **kwargs)
+
+
+def required_number(name, missing, wrong_type, **kwargs):
+    return Field(name, int, required=True, coerce=parse_number, missing=missing, wrong_type=wrong_type, **kwargs)
+
+
+def optional_bool(name, default, wrong_type, **kwargs):
+    return Field(name, bool, default=default, coerce=parse_bool, wrong_type=wrong_type, **kwargs)
+
+
+def tree_value(name):
+    return Field(name, dict, default=None, wrong_type='The provided ' + name + ' key in tree_values has to be an object.')
+
+
+def positive(value):
+    return value > 0
+
+
+def not_negative(value):
+    return value >= 0
+
+
+DIZMO_SETTINGS_SCHEMA = [
+    required_string('display_name',
+        'Specify a display name in your config file under `dizmo_settings`.',
+        'The display_name key needs to be a string.',
+        'The display_name has to consist of at least one character.'),
+    required_string('bundle_name',
+        'Please specify a "bundle_name" under the dizmo_settings key in your project.cfg file.',
+        'The bundle_name key needs to be a string.',
+        'The bundle_name needs to be at least one character long.',
+        locked=True),
+    required_string('bundle_identifier',
+        'Specify a bundle identifier in your config file under `dizmo_settings`.',
+        'The bundle_identifier key needs to be a string.',
+        'The bundle_identifier has to consist of at least one character.',
+        locked=True),
+    required_number('width',
+        'Specify a width in your config file under `dizmo_settings`.',
+        'The width key needs to be a number.'),
+    required_number('height',
+        'Specify a height in your config file under `dizmo_settings`.',
+        'The height key needs to be a number.'),
+    required_number('box_inset_x',
+        'Specify a box inset x in your config file under `dizmo_settings`.',
+        'The box_inset_x key needs to be a number.',
+        locked=True),
+    required_number('box_inset_y',
+        'Specify a box inset y in your config file under `dizmo_settings`.',
+        'The box_inset_y key needs to be a number.',
+        locked=True),
+    required_string('description',
+        'Add a description in your config file under `dizmo_settings`.',
+        'The description needs to be a string.',
+        'The description has to consist of at least one character.',
+        locked=True),
+    Field('tags', list, required=True, locked=True,
+        missing='Add a list of tags in your config file under `dizmo_settings`.',
+        wrong_type='The tags need to be a list ["...", "..."].'),
+    required_string('category',
+        'Add a category in your config file under `dizmo_settings`.',
+        'The category needs to be a string.',
+        'The category has to consist of at least one character.',
+        choices=CATEGORIES,
+        not_allowed='The category has to be one of the following: ' + ', '.join('"' + category + '"' for category in CATEGORIES),
+        locked=True),
+    required_string('min_space_version',
+        'Add a min_space_version in your config file under `dizmo_settings`.',
+        'The min_space_version needs to be string.',
+        'The min_space_version has to consist of at least one character.',
+        locked=True),
+    required_string('change_log',
+        'Add a change_log in your config file under `dizmo_settings`.',
+        'The change_log needs to be string.',
+        'The change_log has to consist of at least one character.',
+        locked=True),
+    required_string('api_version',
+        'Specify an api version in your config file under `dizmo_settings`.',
+        'The api_version key needs to be a string.',
+        'The api_version has to consist of at least one character.',
+        locked=True),
+    required_string('main_html',
+        'Specify a main html in your config file under `dizmo_settings`.',
+        'The main_html key needs to be a string.',
+        'The main_html has to consist of at least one character.',
+        locked=True),
+    optional_bool('hidden_dizmo', False, 'The provided value for hidden_dizmo needs to be a boolean.', locked=True),
+    optional_bool('allow_resize', False, 'The provided value for allow_resize needs to be a boolean'),
+    optional_bool('title_editable', True, 'The provided value for title_editable needs to be a boolean.'),
+    optional_bool('force_update', False, 'The provided value for force_update needs to be a boolean.', locked=True),
+    Field('elements_version', default=None, locked=True),
+    Field('helper_version', default=None),
+    Field('attributes', default={}),
+    Field('private', default={}),
+    Field('public', default={}),
+    Field('tree_values', dict, default=None,
+        wrong_type='The provided tree_values key has to be an object.',
+        fields=[tree_value('attributes'), tree_value('private'), tree_value('public')])
+]
+
+STORE_SCHEMA = [
+    Field('chunk_size', int, default=1048576, check=positive, coerce=parse_number,
+        wrong_type='The chunk_size key under store needs to be a positive number.',
+        invalid='The chunk_size key under store needs to be a positive number.'),
+    Field('retries', int, default=3, check=not_negative, coerce=parse_number,
+        wrong_type='The retries key under store needs to be a number.',
+        invalid='The retries key under store needs to be a number.'),
+    Field('timeout', NUMBER, default=30, check=positive, coerce=parse_number,
+        wrong_type='The timeout key under store needs to be a positive number.',
+        invalid='The timeout key under store needs to be a positive number.'),
+    Field('backoff', NUMBER, default=0.5, check=not_negative, coerce=parse_number,
+        wrong_type='The backoff key under store needs to be a number.',
+        invalid='The backoff key under store needs to be a number.'),
+    Field('concurrency', int, default=4, check=positive, coerce=parse_number,
+        wrong_type='The concurrency key under store needs to be a positive number.',
+        invalid='The concurrency key under store needs to be a positive number.'),
+    optional_bool('session_cache', True, 'The provided value for session_cache needs to be a boolean.'),
+    Field('session_lifetime', int, default=3600, check=positive, coerce=parse_number,
+        wrong_type='The session_lifetime key under store needs to be a positive number.',
+        invalid='The session_lifetime key under store needs to be a positive number.'),
+    optional_bool('resumable_upload', False, 'The provided value for resumable_upload needs to be a boolean.'),
+    optional_bool('skip_unchanged', True, 'The provided value for skip_unchanged needs to be a boolean.')
+]
+
+SUBPROJECTS_SCHEMA = [
+    optional_bool('incremental', True, 'The provided value for incremental under subprojects needs to be a boolean.'),
+    Field('workers', int, default=None, nullable=True, check=positive, coerce=parse_number,
+        wrong_type='The workers key under subprojects needs to be a positive number.',
+        invalid='The workers key under subprojects needs to be a positive number.')
+]
+
+PLIST_SCHEMA = [
+    Field('format', STRING, default='xml', choices=['xml', 'binary'],
+        wrong_type='The format key under plist needs to be either "xml" or "binary".',
+        not_allowed='The format key under plist needs to be either "xml" or "binary".')
+]
+
+LINT_SCHEMA = [
+    optional_bool('cache', True, 'The provided value for cache under lint needs to be a boolean.'),
+    Field('workers', int, default=None, nullable=True, check=positive, coerce=parse_number,
+        wrong_type='The workers key under lint needs to be a positive number.',
+        invalid='The workers key under lint needs to be a positive number.')
+]
+
+DEPLOY_SCHEMA = [
+    optional_bool('delta', False, 'The provided value for delta under deploy needs to be a boolean.')
+]
+
+WATCH_SCHEMA = [
+    Field('debounce', NUMBER, default=0.3, check=not_negative, coerce=parse_number,
+        wrong_type='The debounce key under watch needs to be a number.',
+        invalid='The debounce key under watch needs to be a number.')
+]
+
+DISPLAY_SCHEMA = [
+    Field('format', STRING, default='table', choices=['table', 'json'],
+        wrong_type='The format key under display needs to be either "table" or "json".',
+        not_allowed='The format key under display needs to be either "table" or "json".'),
+    Field('cache_lifetime', int, default=30, check=not_negative, coerce=parse_number,
+        wrong_type='The cache_lifetime key under display needs to be a number.',
+        invalid='The cache_lifetime key under display needs to be a number.')
+]
+
+TRACE_SCHEMA = [
+    optional_bool('enabled', False, 'The provided value for enabled under trace needs to be a boolean.'),
+    Field('path', STRING, default=os.path.join('build', 'trace.json'), min_length=1,
+        wrong_type='The path key under trace needs to be a string.',
+        too_short='The path key under trace has to consist of at least one character.')
+]
+
+BATCH_SCHEMA = [
+    Field('bundles', list, default=[], coerce=split_list,
+        wrong_type='The bundles key under batch needs to be a list ["...", "..."].',
+        items=Field('bundle', STRING, min_length=1,
+            wrong_type='Every entry of the bundles key under batch needs to be a bundle identifier.',
+            too_short='Every entry of the bundles key under batch needs to be a bundle identifier.'))
+]
+
+CONFIG_SCHEMA = Schema([
+    Field('dizmo_settings', dict, required=True, fields=DIZMO_SETTINGS_SCHEMA,
+        missing='Could not find settings for dizmo.',
+        wrong_type='Could not find settings for dizmo.'),
+    Field('store', dict, default={}, fields=STORE_SCHEMA,
+        wrong_type='The provided store key has to be an object.'),
+    Field('subprojects', dict, default={}, fields=SUBPROJECTS_SCHEMA,
+        wrong_type='The provided subprojects key has to be an object.'),
+    Field('batch', dict, default={}, fields=BATCH_SCHEMA,
+        wrong_type='The provided batch key has to be an object.'),
+    Field('plist', dict, default={}, fields=PLIST_SCHEMA,
+        wrong_type='The provided plist key has to be an object.'),
+    Field('lint', dict, default={}, fields=LINT_SCHEMA,
+        wrong_type='The provided lint key has to be an object.'),
+    Field('deploy', dict, default={}, fields=DEPLOY_SCHEMA,
+        wrong_type='The provided deploy key has to be an object.'),
+    Field('watch', dict, default={}, fields=WATCH_SCHEMA,
+        wrong_type='The provided watch key has to be an object.'),
+    Field('display', dict, default={}, fields=DISPLAY_SCHEMA,
+        wrong_type='The provided display key has to be an object.'),
+    Field('trace', dict, default={}, fields=TRACE_SCHEMA,
+        wrong_type='The provided trace key has to be an object.')
+])
@@ -0,0 +1,156 @@
+from __future__ import absolute_import
+from builtins import object
+import os
+import time
+import hashlib
+import tempfile
+import zipfile
+from shutil import copy2, copytree, rmtree
+import requests
+from grace.error import FolderNotFoundError, FolderNotWritableError, GeneralError
+from .utils import load_manifest, write_manifest, replace_file, make_dirs
+
+
+requests.packages.urllib3.disable_warnings()
+
+
+SEED_DIR_VARIABLE = 'GRACE_SKELETON_DIR'
+OFFLINE_VARIABLE = 'GRACE_SKELETON_OFFLINE'
+TTL_VARIABLE = 'GRACE_SKELETON_TTL'
+
+
+def get_archive_folder():
+    return os.path.join(os.path.expanduser('~'), '.grace', 'skeletons', 'archives')
+
+
+class SkeletonCache(object):
+    def __init__(self, url, skeleton_path, name=None):
+        key = hashlib.md5(url.encode('utf-8')).hexdigest()
+
+        self._url = url
+        self._name = name
+        self._skeleton_path = skeleton_path
+        self._archive_path = os.path.join(get_archive_folder(), key + '.zip')
+        self._meta_path = os.path.join(get_archive_folder(), key + '.json')
+        self._offline = os.environ.get(OFFLINE_VARIABLE, '') not in ['', '0', 'false']
+
+        try:
+            self._ttl = int(os.environ.get(TTL_VARIABLE, 24 * 60 * 60))
+        except ValueError:
+            self._ttl = 24 * 60 * 60
+
+    def fetch(self):
+        meta = load_manifest(self._meta_path)
+        if meta.get('url') != self._url or not os.path.isfile(self._archive_path):
+            meta = self._seed()
+
+        fresh = len(meta) > 0 and time.time() - meta['fetched'] < self._ttl
+        if self._offline or fresh:
+            self._use_cached(meta)
+            return
+
+        headers = {}
+        if meta.get('etag') is not None:
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified') is not None:
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            r = requests.get(self._url, headers=headers, stream=True, timeout=30)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self._use_cached(meta)
+            return
+
+        if r.status_code == 304 and len(meta) > 0:
+            meta['fetched'] = time.time()
+            write_manifest(self._meta_path, meta)
+            self._use_cached(meta)
+            return
+
+        if r.status_code != 200:
+            self._use_cached(meta)
+            return
+
+        make_dirs(get_archive_folder())
+        tmp_path = self._archive_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for chunk in r.iter_content(chunk_size=65536):
+                if chunk:
+                    f.write(chunk)
+        replace_file(tmp_path, self._archive_path)
+
+        meta = {
+            'url': self._url,
+            'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'fetched': time.time()
+        }
+        self._extract()
+        write_manifest(self._meta_path, meta)
+
+    def _seed(self):
+        seed_dir = os.environ.get(SEED_DIR_VARIABLE)
+        if seed_dir is None:
+            return {}
+
+        names = [os.path.basename(self._url), os.path.basename(self._archive_path)]
+        if self._name is not None:
+            names.insert(0, self._name + '.zip')
+
+        for name in names:
+            seed = os.path.join(seed_dir, name)
+            if os.path.isfile(seed):
+                make_dirs(get_archive_folder())
+                copy2(seed, self._archive_path)
+
+                meta = {
+                    'url': self._url,
+                    'etag': None,
+                    'last_modified': None,
+                    'fetched': time.time()
+                }
+                self._extract()
+                write_manifest(self._meta_path, meta)
+                return meta
+
+        return {}
+
+    def _use_cached(self, meta):
+        if os.path.exists(self._skeleton_path):
+            return
+
+        if len(meta) > 0 and os.path.isfile(self._archive_path):
+            self._extract()
+            return
+
+        raise FolderNotFoundError('Could not download the skeleton and no downloaded skeleton was found.')
+
+    def _extract(self):
+        tmp_path = tempfile.mkdtemp()
+
+        try:
+            try:
+                z = zipfile.ZipFile(self._archive_path, 'r')
+            except zipfile.BadZipfile:
+                raise GeneralError('Could not unzip the downloaded file. Something went wrong, please try again.')
+
+            try:
+                z.extractall(tmp_path)
+                root = z.namelist()[0].split('/')[0]
+            finally:
+                z.close()
+
+            make_dirs(os.path.dirname(self._skeleton_path))
+
+            if os.path.exists(self._skeleton_path):
+                try:
+                    rmtree(self._skeleton_path)
+                except:
+                    raise FolderNotWritableError('Could not remove the saved skeleton.')
+
+            try:
+                copytree(os.path.join(tmp_path, root), self._skeleton_path)
+            except:
+                raise FolderNotFoundError('Could not find the folder to save the skeleton.')
+        finally:
+            rmtree(tmp_path)
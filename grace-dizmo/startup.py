@@ -0,0 +1,98 @@
+from __future__ import print_function
+from __future__ import absolute_import
+from __future__ import division
+import os
+import sys
+import json
+import shutil
+import tarfile
+import argparse
+import tempfile
+import subprocess
+from .utils import format_table
+
+
+SCRIPT = '''
+import time
+import json
+timings = {}
+
+start = time.time()
+import grace.management
+timings['grace'] = time.time() - start
+
+start = time.time()
+__import__('grace-dizmo.plugin')
+timings['plugin'] = time.time() - start
+
+print(json.dumps(timings))
+'''
+
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def measure(runs, root):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([root] + [path for path in sys.path if len(path) > 0])
+
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        for index in range(runs):
+            output = subprocess.check_output([sys.executable, '-c', SCRIPT], stderr=devnull, env=env, cwd=root)
+            results.append(json.loads(output.decode('utf-8').strip().splitlines()[-1]))
+
+    return results
+
+
+def checkout(revision, root, dest):
+    # The plugin as it was at the given revision, to compare against.
+    archive = subprocess.check_output(['git', 'archive', '--format=tar', revision, 'grace-dizmo'], cwd=root)
+
+    path = os.path.join(dest, 'archive.tar')
+    with open(path, 'wb') as f:
+        f.write(archive)
+
+    with tarfile.open(path) as tar:
+        tar.extractall(dest)
+
+
+def format_timings(name, values):
+    return [name, '%.1f ms' % (median(values) * 1000), '%.1f ms' % (min(values) * 1000), '%.1f ms' % (max(values) * 1000)]
+
+
+def run(runs=10, baseline=None):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    current = measure(runs, root)
+
+    rows = [
+        format_timings('grace', [result['grace'] for result in current]),
+        format_timings('plugin', [result['plugin'] for result in current])
+    ]
+
+    if baseline is not None:
+        folder = tempfile.mkdtemp()
+        try:
+            checkout(baseline, root, folder)
+            previous = measure(runs, folder)
+        finally:
+            shutil.rmtree(folder, True)
+
+        rows.append(format_timings('plugin at ' + baseline, [result['plugin'] for result in previous]))
+
+    return format_table(['Import', 'Median', 'Min', 'Max'], rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure how long python takes to load grace and the grace-dizmo plugin.')
+    parser.add_argument('--runs', type=int, default=10, help='number of fresh interpreters to start')
+    parser.add_argument('--baseline', help='git revision of the plugin to compare against')
+    args = parser.parse_args(argv)
+
+    print(run(args.runs, args.baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,552 @@
+from __future__ import absolute_import
+from __future__ import division
+from builtins import object
+import os
+import re
+import sys
+import time
+import uuid
+import requests
+import requests.adapters
+from grace.error import RemoteServerError, FileNotFoundError
+from grace.utils import write_json, isstring
+from .utils import load_manifest, write_manifest, make_dirs, replace_file, format_size
+
+
+requests.packages.urllib3.disable_warnings()
+
+
+DIGEST_KEYS = ['sha256', 'sha1', 'md5', 'checksum', 'hash', 'digest', 'bundle_hash']
+DIGEST_LENGTHS = {32: 'md5', 40: 'sha1', 64: 'sha256'}
+
+
+class Progress(object):
+    def __init__(self, label, total, stream=None, interval=0.5, enabled=True):
+        self._label = label
+        self._enabled = enabled
+        self._total = total
+        self._stream = stream if stream is not None else sys.stdout
+        self._interval = interval
+        self._done = 0
+        self._started = time.time()
+        self._last_output = 0
+
+    def reset(self, done=0):
+        self._done = done
+        self._started = time.time()
+
+    def update(self, count):
+        self._done += count
+
+        now = time.time()
+        if self._enabled and now - self._last_output >= self._interval:
+            self._last_output = now
+            self._write()
+
+    def finish(self):
+        if not self._enabled:
+            return
+
+        self._write()
+        self._stream.write('\n')
+        self._stream.flush()
+
+    def _write(self):
+        elapsed = max(time.time() - self._started, 0.001)
+        percent = 100 if self._total == 0 else int(self._done * 100 / self._total)
+
+        self._stream.write('\r' + self._label + ': ' + str(percent) + '% (' + format_size(self._done) + ' of ' + format_size(self._total) + ', ' + format_size(self._done / elapsed) + '/s)')
+        self._stream.flush()
+
+
+class MultipartFile(object):
+    def __init__(self, path, field='file', chunk_size=65536, callback=None):
+        boundary = uuid.uuid4().hex
+
+        self._path = path
+        self._chunk_size = chunk_size
+        self._callback = callback
+        self._head = ('--' + boundary + '\r\n'
+                      'Content-Disposition: form-data; name="' + field + '"; filename="' + os.path.basename(path) + '"\r\n'
+                      'Content-Type: application/octet-stream\r\n\r\n').encode('utf-8')
+        self._tail = ('\r\n--' + boundary + '--\r\n').encode('utf-8')
+        self._file = None
+        self._buffer = b''
+        self._offset = 0
+        self._parts = None
+        self._current = None
+
+        self.content_type = 'multipart/form-data; boundary=' + boundary
+        self.len = len(self._head) + os.path.getsize(path) + len(self._tail)
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self._chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def _next_part(self):
+        if self._parts is None:
+            self._parts = iter(['head', 'file', 'tail'])
+            self._file = open(self._path, 'rb')
+
+        while True:
+            if self._current == 'file':
+                data = self._file.read(self._chunk_size)
+                if data:
+                    if self._callback is not None:
+                        self._callback(len(data))
+                    return data
+
+            try:
+                self._current = next(self._parts)
+            except StopIteration:
+                self.close()
+                return b''
+
+            if self._current == 'head':
+                return self._head
+            if self._current == 'tail':
+                return self._tail
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len
+
+        chunks = []
+        while size > 0:
+            if self._offset >= len(self._buffer):
+                self._buffer = self._next_part()
+                self._offset = 0
+                if not self._buffer:
+                    break
+
+            chunk = self._buffer[self._offset:self._offset + size]
+            self._offset += len(chunk)
+            size -= len(chunk)
+            chunks.append(chunk)
+
+        return b''.join(chunks)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SessionCache(object):
+    def __init__(self, path=None, lifetime=3600):
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.grace', 'sessions.json')
+
+        self._path = path
+        self._lifetime = lifetime
+
+    def get(self, url, username):
+        # Without a username there is no telling whose session would be used.
+        if username is None:
+            return None
+
+        entry = self._load().get(url + '\n' + username)
+        if entry is None or entry['expires'] <= time.time():
+            return None
+
+        return entry
+
+    def set(self, url, username, cookies):
+        now = time.time()
+        expires = now + self._lifetime
+        stored = []
+
+        for cookie in cookies:
+            if cookie.expires is not None:
+                expires = min(expires, cookie.expires)
+            stored.append({
+                'name': cookie.name,
+                'value': cookie.value,
+                'domain': cookie.domain,
+                'path': cookie.path,
+                'secure': cookie.secure,
+                'expires': cookie.expires
+            })
+
+        sessions = self._load()
+        sessions[url + '\n' + username] = {
+            'url': url,
+            'username': username,
+            'saved': now,
+            'expires': expires,
+            'cookies': stored
+        }
+        self._save(sessions)
+
+    def remove(self, url, username=None):
+        sessions = self._load()
+
+        for key, entry in list(sessions.items()):
+            if entry['url'] == url and (username is None or entry['username'] == username):
+                sessions.pop(key)
+
+        self._save(sessions)
+
+    def _load(self):
+        sessions = load_manifest(self._path)
+        now = time.time()
+
+        return dict((key, entry) for key, entry in sessions.items() if entry.get('expires', 0) > now)
+
+    def _save(self, sessions):
+        make_dirs(os.path.dirname(self._path))
+        tmp_path = self._path + '.tmp'
+
+        # The file holds authenticated cookies, only the current user may read it.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(write_json(sessions))
+
+        os.chmod(tmp_path, 0o600)
+        replace_file(tmp_path, self._path)
+
+
+class StoreClient(object):
+    retry_status = [502, 503, 504]
+
+    def __init__(self, base_url, verify=False, timeout=30, retries=3, backoff=0.5, pool_size=10, session_cache=None):
+        self.base_url = base_url
+        self.session_cache = session_cache
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self._session = requests.Session()
+        self._session.verify = verify
+
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    @property
+    def cookies(self):
+        return self._session.cookies
+
+    def url(self, *parts):
+        return self.base_url + '/' + '/'.join(parts)
+
+    def wait(self, attempt):
+        time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+    def request(self, method, url, retries=None, **kwargs):
+        if 'timeout' not in kwargs:
+            kwargs['timeout'] = self.timeout
+
+        if retries is None:
+            retries = self.retries
+
+        attempt = 0
+        while True:
+            try:
+                r = self._session.request(method, url, **kwargs)
+                if r.status_code not in self.retry_status or attempt >= retries:
+                    return r
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= retries:
+                    raise RemoteServerError('Could not connect to the store server (' + self.base_url + '). Please try again.')
+
+            attempt += 1
+            self.wait(attempt)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def restore_session(self, username):
+        if self.session_cache is None:
+            return False
+
+        entry = self.session_cache.get(self.base_url, username)
+        if entry is None:
+            return False
+
+        for cookie in entry['cookies']:
+            self._session.cookies.set(cookie['name'], cookie['value'],
+                domain=cookie['domain'],
+                path=cookie['path'],
+                secure=cookie['secure'],
+                expires=cookie['expires']
+            )
+
+        return True
+
+    def save_session(self, username):
+        if self.session_cache is not None:
+            self.session_cache.set(self.base_url, username, self._session.cookies)
+
+    def forget_session(self, username):
+        self._session.cookies.clear()
+
+        if self.session_cache is not None:
+            self.session_cache.remove(self.base_url, username)
+
+    def login(self, username, password):
+        return self.post(self.url('oauth', 'login'),
+            data=write_json({
+                'username': username,
+                'password': password
+            }),
+            headers={'Content-Type': 'application/json'}
+        )
+
+    def close(self):
+        self._session.close()
+
+
+_clients = {}
+
+
+def get_store_client(config):
+    store = config['store']
+    base_url = config['urls']['dizmo_store']
+
+    key = (base_url, store['timeout'], store['retries'], store['backoff'], store['concurrency'], store['session_cache'], store['session_lifetime'])
+    if key not in _clients:
+        session_cache = None
+        if store['session_cache']:
+            session_cache = SessionCache(lifetime=store['session_lifetime'])
+
+        _clients[key] = StoreClient(base_url,
+            timeout=store['timeout'],
+            retries=store['retries'],
+            backoff=store['backoff'],
+            pool_size=max(10, store['concurrency']),
+            session_cache=session_cache
+        )
+
+    return _clients[key]
+
+
+class BundleUploader(object):
+    def __init__(self, path, client, chunk_size=1048576, resumable=False, show_progress=True):
+        if not os.path.exists(path):
+            raise FileNotFoundError('Could not find the zip file. Please check if "' + path + '" exists.')
+
+        self._path = path
+        self._client = client
+        self._chunk_size = chunk_size
+        self._resumable = resumable
+        self._show_progress = show_progress
+        self._size = os.path.getsize(path)
+
+    def upload(self, method, url):
+        progress = Progress('Uploading ' + os.path.basename(self._path), self._size, enabled=self._show_progress)
+
+        try:
+            r = None
+            if self._resumable and method == 'put':
+                r = self._upload_ranges(url, progress)
+
+            if r is None:
+                r = self._upload_whole(method, url, progress)
+        finally:
+            progress.finish()
+
+        return r
+
+    def _upload_whole(self, method, url, progress):
+        attempt = 0
+
+        while True:
+            body = MultipartFile(self._path, chunk_size=self._chunk_size, callback=progress.update)
+            progress.reset()
+            error = 'Could not upload the file to the store server. Please try again.'
+
+            try:
+                r = self._client.request(method.upper(), url,
+                    retries=0,
+                    data=body,
+                    headers={'Content-Type': body.content_type}
+                )
+
+                # A gateway error page is not an answer of the store, the upload is sent again.
+                if r.status_code not in self._client.retry_status:
+                    return r
+
+                error = 'The store server is not available (status ' + str(r.status_code) + '), could not upload the file. Please try again later.'
+            except RemoteServerError:
+                pass
+            finally:
+                body.close()
+
+            attempt += 1
+            if attempt > self._client.retries:
+                raise RemoteServerError(error)
+            self._client.wait(attempt)
+
+    def _upload_ranges(self, url, progress):
+        offset = 0
+        attempt = 0
+
+        with open(self._path, 'rb') as f:
+            while True:
+                f.seek(offset)
+                data = f.read(self._chunk_size)
+                if not data:
+                    raise RemoteServerError('The store server did not confirm the finished upload. Please try again.')
+
+                end = offset + len(data) - 1
+
+                try:
+                    r = self._client.put(url,
+                        retries=0,
+                        data=data,
+                        headers={
+                            'Content-Type': 'application/octet-stream',
+                            'Content-Range': 'bytes ' + str(offset) + '-' + str(end) + '/' + str(self._size)
+                        }
+                    )
+                except RemoteServerError:
+                    r = None
+
+                if r is not None and (r.status_code == 200 or r.status_code == 201):
+                    if end + 1 == self._size:
+                        progress.update(len(data))
+                        return r
+
+                    # A store ignoring the Content-Range header took the first chunk for the whole file.
+                    if offset == 0:
+                        return None
+
+                    raise RemoteServerError('The store server finished the upload before it received the whole file. Please try again.')
+
+                if r is not None and r.status_code == 308:
+                    acknowledged = self._acknowledged(r, end + 1)
+                    progress.update(acknowledged - offset)
+                    offset = acknowledged
+                    attempt = 0
+                    continue
+
+                if r is not None and offset == 0 and r.status_code < 500:
+                    # The store does not understand ranged uploads, send the whole file instead.
+                    return None
+
+                if r is not None and r.status_code < 500:
+                    return r
+
+                attempt += 1
+                if attempt > self._client.retries:
+                    raise RemoteServerError('Could not upload the file to the store server. Please try again.')
+
+                self._client.wait(attempt)
+                offset = self._query_offset(url, offset)
+                progress.reset(offset)
+
+    def _query_offset(self, url, offset):
+        try:
+            r = self._client.put(url,
+                retries=0,
+                headers={'Content-Range': 'bytes */' + str(self._size)}
+            )
+        except RemoteServerError:
+            return offset
+
+        if r.status_code == 308:
+            return self._acknowledged(r, 0)
+
+        return offset
+
+    def _acknowledged(self, r, default):
+        if 'Range' not in r.headers:
+            return default
+
+        match = re.match(r'^bytes=0-([0-9]+)$', r.headers['Range'].strip())
+        if match is None:
+            return default
+
+        return int(match.group(1)) + 1
+
+
+def find_remote_digest(meta):
+    for key in DIGEST_KEYS:
+        value = meta.get(key)
+        if not isstring(value):
+            continue
+
+        value = value.strip().lower()
+        if ':' in value:
+            algorithm, value = value.split(':', 1)
+        else:
+            algorithm = DIGEST_LENGTHS.get(len(value))
+
+        if algorithm in ['md5', 'sha1', 'sha256'] and re.match(r'^[0-9a-f]+$', value):
+            return algorithm, value
+
+    for value in meta.values():
+        if isinstance(value, dict):
+            found = find_remote_digest(value)
+            if found is not None:
+                return found
+
+    return None
+
+
+class UploadRecord(object):
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.grace', 'uploads.json')
+
+        self._path = path
+
+    def get(self, url, bundle, version):
+        return load_manifest(self._path).get(url + '\n' + bundle + '\n' + version)
+
+    def set(self, url, bundle, version, digest):
+        uploads = load_manifest(self._path)
+        uploads[url + '\n' + bundle + '\n' + version] = digest
+        write_manifest(self._path, uploads)
+
+
+class PublishStatusCache(object):
+    def __init__(self, path, lifetime=30):
+        self._path = path
+        self._lifetime = lifetime
+
+    def get(self, url, bundle):
+        entry = load_manifest(self._path).get(url + '\n' + bundle)
+        if entry is None or time.time() - entry['fetched'] >= self._lifetime:
+            return None
+
+        return entry['result']
+
+    def update(self, url, results):
+        if self._lifetime <= 0 or len(results) == 0:
+            return
+
+        now = time.time()
+        statuses = dict((key, entry) for key, entry in load_manifest(self._path).items() if now - entry['fetched'] < self._lifetime)
+
+        for bundle, result in results.items():
+            statuses[url + '\n' + bundle] = {'fetched': now, 'result': result}
+
+        write_manifest(self._path, statuses)
+
+
+def summarize_publish_information(data):
+    versions = data
+    if isinstance(data, dict):
+        versions = data.get('versions', [data] if 'version' in data else [])
+
+    if not isinstance(versions, list):
+        return '', ''
+
+    names = [str(entry['version']) for entry in versions if isinstance(entry, dict) and 'version' in entry]
+    published = [str(entry['version']) for entry in versions if isinstance(entry, dict) and 'version' in entry and entry.get('published')]
+
+    return (names[-1] if len(names) > 0 else ''), ', '.join(published)
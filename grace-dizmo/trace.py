@@ -0,0 +1,185 @@
+from __future__ import absolute_import
+from __future__ import division
+from builtins import object
+import os
+import time
+import threading
+from contextlib import contextmanager
+from grace.utils import load_json, write_json
+from .utils import make_dirs, replace_file, format_size, format_table
+
+
+TRACE_VARIABLE = 'GRACE_DIZMO_TRACE'
+
+_tracer = None
+
+
+def cpu_time():
+    if hasattr(time, 'process_time'):
+        return time.process_time()
+
+    times = os.times()
+    return times[0] + times[1]
+
+
+def read_io():
+    # Only linux reports the bytes a process has read and written.
+    try:
+        with open('/proc/self/io') as f:
+            values = dict(line.split(':', 1) for line in f.read().splitlines() if ':' in line)
+        return int(values['rchar']), int(values['wchar'])
+    except (IOError, OSError, KeyError, ValueError):
+        return None
+
+
+def count_files(path):
+    if os.path.isfile(path):
+        return 1, os.path.getsize(path)
+
+    count = 0
+    size = 0
+    for root, dirs, filenames in os.walk(path):
+        for f in filenames:
+            try:
+                size += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                continue
+            count += 1
+
+    return count, size
+
+
+class Tracer(object):
+    def __init__(self, label):
+        self.label = label
+        self.events = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+        self._add({'name': 'process_name', 'ph': 'M', 'pid': self._pid, 'tid': 0, 'args': {'name': label}})
+
+    def _add(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def stage(self, name, path=None, **args):
+        io = read_io()
+        cpu = cpu_time()
+        start = time.time()
+        failed = True
+
+        try:
+            yield
+            failed = False
+        finally:
+            end = time.time()
+            args['cpu_ms'] = round((cpu_time() - cpu) * 1000, 3)
+
+            if io is not None:
+                after = read_io()
+                args['read'] = after[0] - io[0]
+                args['written'] = after[1] - io[1]
+
+            if path is not None and os.path.exists(path):
+                args['files'], args['size'] = count_files(path)
+
+            if failed:
+                args['failed'] = True
+
+            self._add({
+                'name': name,
+                'cat': 'stage',
+                'ph': 'X',
+                'ts': int(start * 1000000),
+                'dur': int((end - start) * 1000000),
+                'pid': self._pid,
+                'tid': threading.current_thread().ident,
+                'args': args
+            })
+
+    def merge(self, path):
+        try:
+            with open(path) as f:
+                trace = load_json(f.read())
+        except (IOError, OSError, ValueError):
+            return
+
+        if isinstance(trace, dict) and isinstance(trace.get('traceEvents'), list):
+            with self._lock:
+                self.events.extend(trace['traceEvents'])
+
+    def write(self, path):
+        make_dirs(os.path.dirname(path))
+        tmp_path = path + '.tmp'
+
+        with open(tmp_path, 'w') as f:
+            f.write(write_json({'traceEvents': self.events, 'displayTimeUnit': 'ms'}))
+
+        replace_file(tmp_path, path)
+
+    def summary(self):
+        labels = {}
+        stages = {}
+        order = []
+
+        for event in self.events:
+            if event.get('ph') == 'M' and event.get('name') == 'process_name':
+                labels[event['pid']] = event['args']['name']
+            elif event.get('ph') == 'X':
+                key = (event['pid'], event['name'])
+                if key not in stages:
+                    stages[key] = {'calls': 0, 'wall': 0, 'cpu': 0, 'read': None, 'written': None, 'files': None}
+                    order.append(key)
+
+                stage = stages[key]
+                stage['calls'] += 1
+                stage['wall'] += event['dur'] / 1000
+                stage['cpu'] += event['args'].get('cpu_ms', 0)
+                for name in ['read', 'written', 'files']:
+                    if name in event['args']:
+                        stage[name] = (stage[name] or 0) + event['args'][name]
+
+        rows = []
+        for key in sorted(order, key=lambda key: -stages[key]['wall']):
+            stage = stages[key]
+            rows.append([
+                labels.get(key[0], str(key[0])),
+                key[1],
+                str(stage['calls']),
+                '%.1f ms' % stage['wall'],
+                '%.1f ms' % stage['cpu'],
+                format_size(stage['read']) if stage['read'] is not None else '-',
+                format_size(stage['written']) if stage['written'] is not None else '-',
+                str(stage['files']) if stage['files'] is not None else '-'
+            ])
+
+        return format_table(['Project', 'Stage', 'Calls', 'Wall', 'CPU', 'Read', 'Written', 'Files'], rows)
+
+
+def start_tracing(label):
+    global _tracer
+    _tracer = Tracer(label)
+    return _tracer
+
+
+def stop_tracing():
+    global _tracer
+    tracer = _tracer
+    _tracer = None
+    return tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+@contextmanager
+def stage(name, path=None, **args):
+    tracer = _tracer
+    if tracer is None:
+        yield
+        return
+
+    with tracer.stage(name, path, **args):
+        yield
@@ -0,0 +1,216 @@
+from __future__ import absolute_import
+from __future__ import division
+import os
+import sys
+import hashlib
+from shutil import copy2, copystat
+from grace.utils import load_json, write_json
+
+
+# ioctl request number to clone a file on btrfs/xfs (linux/fs.h)
+FICLONE = 0x40049409
+
+
+def get_cache_path(*parts):
+    return os.path.join(os.getcwd(), 'build', '.cache', *parts)
+
+
+def make_dirs(path):
+    if not os.path.exists(path):
+        try:
+            os.makedirs(path)
+        except OSError:
+            if not os.path.isdir(path):
+                raise
+
+
+def file_digest(path, block_size=65536, algorithm='sha1'):
+    digest = hashlib.new(algorithm)
+
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def scan_tree(path, previous=None, exclude=None):
+    if previous is None:
+        previous = {}
+
+    files = {}
+
+    for root, dirs, filenames in os.walk(path):
+        if exclude is not None and root == path:
+            dirs[:] = [d for d in dirs if d not in exclude]
+
+        for f in filenames:
+            filepath = os.path.join(root, f)
+            name = os.path.relpath(filepath, path).replace(os.sep, '/')
+            stat = os.stat(filepath)
+
+            entry = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime
+            }
+
+            if name in previous and previous[name]['size'] == entry['size'] and previous[name]['mtime'] == entry['mtime']:
+                entry['digest'] = previous[name]['digest']
+            else:
+                entry['digest'] = file_digest(filepath)
+
+            files[name] = entry
+
+    return files
+
+
+def tree_digest(files, *extra):
+    digest = hashlib.sha1()
+
+    for name in sorted(files):
+        digest.update((name + '\0' + files[name]['digest'] + '\n').encode('utf-8'))
+
+    for value in extra:
+        digest.update((value + '\n').encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def replace_file(source, dest):
+    if hasattr(os, 'replace'):
+        os.replace(source, dest)
+        return
+
+    # os.rename does not overwrite an existing file on windows
+    if sys.platform.startswith('win32') and os.path.exists(dest):
+        os.remove(dest)
+    os.rename(source, dest)
+
+
+def reflink(source, dest):
+    if not sys.platform.startswith('linux'):
+        return False
+
+    import fcntl
+
+    with open(source, 'rb') as src:
+        with open(dest, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except (IOError, OSError):
+                return False
+
+    copystat(source, dest)
+    return True
+
+
+def copy_file(source, dest):
+    # Outputs never share an inode with their source, an edit of one must not change the other.
+    if os.path.lexists(dest):
+        os.remove(dest)
+
+    try:
+        if reflink(source, dest):
+            return
+    except (IOError, OSError):
+        pass
+
+    copy2(source, dest)
+
+
+def copy_tree(source, dest):
+    for root, dirs, filenames in os.walk(source):
+        target = os.path.join(dest, os.path.relpath(root, source))
+        make_dirs(target)
+
+        for f in filenames:
+            copy_file(os.path.join(root, f), os.path.join(target, f))
+
+
+def files_identical(source, dest):
+    try:
+        source_stat = os.stat(source)
+        dest_stat = os.stat(dest)
+    except OSError:
+        return False
+
+    if source_stat.st_size != dest_stat.st_size:
+        return False
+
+    # Equal mtimes do not prove anything, an edit within the same second keeps both size and mtime.
+    return file_digest(source) == file_digest(dest)
+
+
+def load_manifest(path):
+    try:
+        with open(path) as f:
+            manifest = load_json(f.read())
+    except (IOError, OSError, ValueError):
+        return {}
+
+    if not isinstance(manifest, dict):
+        return {}
+
+    return manifest
+
+
+def write_manifest(path, manifest):
+    make_dirs(os.path.dirname(path))
+    tmp_path = path + '.tmp'
+
+    with open(tmp_path, 'w') as f:
+        f.write(write_json(manifest))
+
+    replace_file(tmp_path, path)
+
+
+def get_worker_count(jobs, workers=None):
+    if workers is None:
+        try:
+            workers = os.cpu_count() or 1
+        except AttributeError:
+            import multiprocessing
+            workers = multiprocessing.cpu_count()
+
+    return max(1, min(jobs, workers))
+
+
+def run_parallel(func, items, workers=None):
+    if len(items) == 0:
+        return []
+
+    if len(items) == 1:
+        return [func(items[0])]
+
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(get_worker_count(len(items), workers))
+    try:
+        return pool.map(func, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def format_size(size):
+    for unit in ['B', 'KB', 'MB']:
+        if size < 1024:
+            return '%.1f %s' % (size, unit)
+        size = size / 1024
+
+    return '%.1f GB' % size
+
+
+def format_table(headers, rows):
+    widths = [len(header) for header in headers]
+    for row in rows:
+        for index, cell in enumerate(row):
+            widths[index] = max(widths[index], len(cell))
+
+    lines = []
+    lines.append('  '.join(header.ljust(widths[index]) for index, header in enumerate(headers)).rstrip())
+    lines.append('  '.join('-' * width for width in widths))
+    for row in rows:
+        lines.append('  '.join(cell.ljust(widths[index]) for index, cell in enumerate(row)).rstrip())
+
+    return '\n'.join(lines)
@@ -0,0 +1,82 @@
+from __future__ import absolute_import
+import os
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from .assets import IMAGE_ASSETS
+
+
+IGNORED_FOLDERS = ['build', 'node_modules']
+IGNORED_SUFFIXES = ['~', '.swp', '.swx', '.tmp']
+
+
+def classify(path, cwd):
+    name = os.path.relpath(path, cwd).replace(os.sep, '/')
+    parts = name.split('/')
+
+    if parts[0] == '..' or parts[0] in IGNORED_FOLDERS:
+        return None
+    if any(part.startswith('.') for part in parts):
+        return None
+    if any(name.endswith(suffix) for suffix in IGNORED_SUFFIXES):
+        return None
+
+    if name == 'project.cfg':
+        return 'config'
+    if parts[0] == 'help':
+        return 'help'
+    if name in IMAGE_ASSETS or (parts[0] == 'assets' and len(parts) == 2 and parts[1] in IMAGE_ASSETS):
+        return 'images'
+    if parts[0] == 'assets':
+        return 'assets'
+    if parts[0] == 'src':
+        return 'build'
+
+    return None
+
+
+class ChangeCollector(FileSystemEventHandler):
+    def __init__(self, cwd, callback, debounce=0.3):
+        self._cwd = cwd
+        self._callback = callback
+        self._debounce = debounce
+        self._stages = set()
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def on_any_event(self, event):
+        paths = [event.src_path]
+        if hasattr(event, 'dest_path'):
+            paths.append(event.dest_path)
+
+        stages = set(classify(path, self._cwd) for path in paths)
+        stages.discard(None)
+        if len(stages) == 0:
+            return
+
+        with self._lock:
+            self._stages.update(stages)
+
+            if self._timer is not None:
+                self._timer.cancel()
+
+            self._timer = threading.Timer(self._debounce, self._flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            stages = self._stages
+            self._stages = set()
+            self._timer = None
+
+        if len(stages) > 0:
+            self._callback(stages)
+
+
+def watch(cwd, callback, debounce=0.3):
+    observer = Observer()
+    observer.schedule(ChangeCollector(cwd, callback, debounce), cwd, recursive=True)
+    observer.start()
+
+    return observer
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The plugin package is called grace-dizmo, it is imported from the checkout with importlib.import_module.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import json
+import zipfile
+from importlib import import_module
+
+archive = import_module('grace-dizmo.archive')
+
+
+def write_file(path, data):
+    folder = os.path.dirname(path)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read_zip(path):
+    with zipfile.ZipFile(path) as z:
+        assert z.testzip() is None
+        return dict((name, z.read(name)) for name in z.namelist())
+
+
+def make_help(tmpdir):
+    source = str(tmpdir.join('help'))
+    write_file(os.path.join(source, 'en', 'help.md'), b'# Help\n' * 100)
+    write_file(os.path.join(source, 'de', 'help.md'), b'# Hilfe\n' * 100)
+    write_file(os.path.join(source, 'en', 'image.png'), b'\x89PNG' + os.urandom(64))
+
+    cache = str(tmpdir.join('cache'))
+    return source, archive.IncrementalZip(source, 'help', os.path.join(cache, 'help.zip'), os.path.join(cache, 'help.json'))
+
+
+def test_incremental_zip_contains_all_files(tmpdir):
+    source, z = make_help(tmpdir)
+
+    assert z.update()
+    files = read_zip(z._archive_path)
+
+    assert sorted(files) == ['help/de/help.md', 'help/en/help.md', 'help/en/image.png']
+    assert files['help/en/help.md'] == b'# Help\n' * 100
+
+
+def test_incremental_zip_unchanged(tmpdir):
+    source, z = make_help(tmpdir)
+    z.update()
+
+    with open(z._archive_path, 'rb') as f:
+        before = f.read()
+
+    assert not z.update()
+    with open(z._archive_path, 'rb') as f:
+        assert f.read() == before
+
+
+def test_incremental_zip_adds_and_changes_files(tmpdir):
+    source, z = make_help(tmpdir)
+    z.update()
+
+    with open(z._manifest_path) as f:
+        unchanged = os.path.join(z._entries_path, json.load(f)['entries']['de/help.md']['key'])
+    os.utime(unchanged, (1, 1))
+
+    write_file(os.path.join(source, 'fr', 'help.md'), b'# Aide\n')
+    write_file(os.path.join(source, 'en', 'help.md'), b'# Changed help\n')
+    os.utime(os.path.join(source, 'en', 'help.md'), (1, 1))
+
+    assert z.update()
+    files = read_zip(z._archive_path)
+
+    assert files['help/fr/help.md'] == b'# Aide\n'
+    assert files['help/en/help.md'] == b'# Changed help\n'
+    assert files['help/de/help.md'] == b'# Hilfe\n' * 100
+
+    # The entry of the unchanged file was not compressed again.
+    assert os.path.getmtime(unchanged) == 1
+
+
+def test_incremental_zip_removes_files(tmpdir):
+    source, z = make_help(tmpdir)
+    z.update()
+
+    os.remove(os.path.join(source, 'de', 'help.md'))
+
+    assert z.update()
+    assert sorted(read_zip(z._archive_path)) == ['help/en/help.md', 'help/en/image.png']
+    assert len(os.listdir(z._entries_path)) == 2
+
+
+def test_incremental_zip_recompresses_missing_entries(tmpdir):
+    source, z = make_help(tmpdir)
+    z.update()
+
+    for f in os.listdir(z._entries_path):
+        os.remove(os.path.join(z._entries_path, f))
+    os.remove(z._archive_path)
+
+    assert z.update()
+    assert len(read_zip(z._archive_path)) == 3
+
+
+def test_deterministic_zip_is_reproducible(tmpdir):
+    source = str(tmpdir.join('build'))
+    write_file(os.path.join(source, 'index.html'), b'<html></html>\n' * 50)
+    write_file(os.path.join(source, 'lib', 'main.js'), b'var a = 1;\n' * 500)
+    write_file(os.path.join(source, 'Icon.png'), os.urandom(256))
+    write_file(os.path.join(source, 'empty.txt'), b'')
+
+    first = str(tmpdir.join('first.dzm'))
+    second = str(tmpdir.join('second.dzm'))
+    archive.DeterministicZip(source, 'dizmo', workers=1).write(first)
+
+    os.utime(os.path.join(source, 'index.html'), (1, 1))
+    archive.DeterministicZip(source, 'dizmo', workers=4).write(second)
+
+    with open(first, 'rb') as f:
+        data = f.read()
+    with open(second, 'rb') as f:
+        assert f.read() == data
+
+    files = read_zip(first)
+    assert files['dizmo/lib/main.js'] == b'var a = 1;\n' * 500
+    assert files['dizmo/empty.txt'] == b''
+
+    with zipfile.ZipFile(first) as z:
+        assert z.getinfo('dizmo/Icon.png').compress_type == zipfile.ZIP_STORED
+        assert z.getinfo('dizmo/lib/main.js').compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_deterministic_zip_batches_by_size(tmpdir, monkeypatch):
+    source = str(tmpdir.join('build'))
+    for index in range(5):
+        write_file(os.path.join(source, str(index) + '.js'), b'x' * 100)
+
+    monkeypatch.setattr(archive, 'BATCH_BYTES', 250)
+    z = archive.DeterministicZip(source, 'dizmo')
+
+    assert [len(batch) for batch in z._batches(archive.list_files(source))] == [2, 2, 1]
+
+
+def test_compress_file_streams_in_chunks(tmpdir, monkeypatch):
+    path = str(tmpdir.join('large.js'))
+    data = b''.join(('line ' + str(index) + '\n').encode('ascii') for index in range(20000))
+    write_file(path, data)
+
+    monkeypatch.setattr(archive, 'CHUNK_SIZE', 1024)
+    dest = io.BytesIO()
+    entry = archive.compress_file(path, dest)
+
+    assert entry['method'] == archive.ZIP_DEFLATED
+    assert entry['size'] == len(data)
+    assert entry['compressed_size'] == len(dest.getvalue())
+
+
+def test_zip_writer_encodes_unicode_names(tmpdir):
+    path = str(tmpdir.join('names.zip'))
+    source = str(tmpdir.join('source.txt'))
+    write_file(source, b'hello')
+
+    with open(path, 'wb') as f:
+        writer = archive.ZipWriter(f)
+        data = io.BytesIO()
+        entry = archive.compress_file(source, data, stored=True)
+        data.seek(0)
+        writer.add(u'help/été.md', entry, data)
+        writer.close()
+
+    assert read_zip(path) == {u'help/été.md': b'hello'}
@@ -0,0 +1,41 @@
+import shutil
+from importlib import import_module
+import pytest
+from grace.error import RemoteServerError
+
+benchmark = import_module('grace-dizmo.benchmark')
+
+
+class Response(object):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.fixture
+def bench():
+    bench = benchmark.Benchmark()
+    yield bench
+
+    bench._store.server_close()
+    shutil.rmtree(bench._folder, True)
+
+
+def test_failed_requests_are_counted_not_timed(bench):
+    statuses = [201, 503, 201, None]
+
+    def upload(index):
+        if statuses[index] is None:
+            raise RemoteServerError('The store server is not available.')
+        return Response(statuses[index])
+
+    bench._measure('upload', upload, 4, 201, 1024)
+
+    name, runs, failed, mean, p95, total, throughput = bench.results[0]
+    assert (runs, failed) == ('4', '2')
+    assert mean.endswith(' ms') and throughput.endswith('/s')
+
+
+def test_all_failed_requests_have_no_timings(bench):
+    bench._measure('publish', lambda index: Response(500), 2, 200)
+
+    assert bench.results[0][1:5] == ['2', '2', '-', '-']
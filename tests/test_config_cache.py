@@ -0,0 +1,130 @@
+import os
+import json
+import stat
+from importlib import import_module
+import pytest
+from grace.error import WrongFormatError
+
+# grace loads the plugin from grace.management, which has imported the rest of grace by then.
+import_module('grace.management')
+config_cache = import_module('grace-dizmo.config_cache')
+plugin = import_module('grace-dizmo.plugin')
+
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        f.write(json.dumps(data))
+
+
+def make_settings(**values):
+    settings = {
+        'display_name': 'Test',
+        'bundle_name': 'Test',
+        'bundle_identifier': 'com.example.test',
+        'width': 400,
+        'height': 300,
+        'box_inset_x': 0,
+        'box_inset_y': 0,
+        'description': 'A test dizmo',
+        'tags': ['test'],
+        'category': 'tools',
+        'min_space_version': '1.0',
+        'change_log': 'First version',
+        'api_version': '1.3',
+        'main_html': 'index.html'
+    }
+    settings.update(values)
+
+    return settings
+
+
+@pytest.fixture
+def project(tmpdir, monkeypatch):
+    home = tmpdir.mkdir('home')
+    home.mkdir('.grace')
+    write_json(str(home.join('.grace', 'grace.cfg')), {'credentials': {'username': 'user', 'password': 'password'}})
+
+    folder = tmpdir.mkdir('project')
+    monkeypatch.setenv('HOME', str(home))
+    monkeypatch.chdir(str(folder))
+
+    def write(**settings):
+        path = str(folder.join('project.cfg'))
+        write_json(path, {'name': 'test', 'version': '1.0.0', 'dizmo_settings': make_settings(**settings)})
+        # Edits within the same second must still change the stat signature.
+        os.utime(path, (os.path.getmtime(path) + len(settings) + 1,) * 2)
+
+    write()
+    return write
+
+
+def loads(monkeypatch):
+    calls = []
+    load = plugin.grace.config.Config._load_configurations
+
+    def counting(self):
+        calls.append(self)
+        return load(self)
+
+    monkeypatch.setattr(plugin.grace.config.Config, '_load_configurations', counting)
+    return calls
+
+
+def test_cache_get_and_set(tmpdir):
+    path = str(tmpdir.join('cache', 'config.json'))
+    cache = config_cache.ConfigCache(path)
+
+    assert cache.get('loaded', 'a') is None
+
+    value = {'credentials': {'password': 'secret'}}
+    cache.set('loaded', 'a', value)
+    value['credentials']['password'] = 'changed'
+
+    cache = config_cache.ConfigCache(path)
+    assert cache.get('loaded', 'a') == {'credentials': {'password': 'secret'}}
+    assert cache.get('loaded', 'b') is None
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_digest_depends_on_the_values():
+    assert config_cache.config_digest('a', [1, 2]) == config_cache.config_digest('a', [1, 2])
+    assert config_cache.config_digest('a', [1, 2]) != config_cache.config_digest('a', [1, 3])
+
+
+def test_config_files_are_loaded_once(project, monkeypatch):
+    calls = loads(monkeypatch)
+
+    assert plugin.Config().get_config()['dizmo_settings']['width'] == 400
+    assert plugin.Config().get_config()['dizmo_settings']['width'] == 400
+    assert len(calls) == 1
+
+    project(width=500)
+    assert plugin.Config().get_config()['dizmo_settings']['width'] == 500
+    assert len(calls) == 2
+
+
+def test_cache_hit_is_still_validated(project, monkeypatch):
+    calls = loads(monkeypatch)
+    plugin.Config().get_config()
+
+    validated = []
+    validate = plugin.CONFIG_SCHEMA.validate
+    monkeypatch.setattr(plugin.CONFIG_SCHEMA, 'validate', lambda data: validated.append(data) or validate(data))
+
+    plugin.Config().get_config()
+    assert len(calls) == 1
+    assert len(validated) == 1
+
+    config = plugin.Config()
+    config.load_overwrites({'dizmo_settings': {'width': 'wide'}})
+    with pytest.raises(WrongFormatError):
+        config.get_config()
+
+
+def test_invalid_edit_is_rejected_after_a_cache_hit(project):
+    plugin.Config().get_config()
+    plugin.Config().get_config()
+
+    project(category='nonsense')
+    with pytest.raises(WrongFormatError):
+        plugin.Config().get_config()
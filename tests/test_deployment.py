@@ -0,0 +1,95 @@
+import os
+from importlib import import_module
+import pytest
+from grace.error import FolderNotFoundError
+
+deployment = import_module('grace-dizmo.deployment')
+
+
+def write_file(path, data):
+    folder = os.path.dirname(path)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    with open(path, 'w') as f:
+        f.write(data)
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+def make_version(folder, version):
+    write_file(os.path.join(folder, 'index.html'), version)
+    return folder
+
+
+@pytest.fixture(params=[True, False], ids=['renameat2', 'rename'])
+def exchange(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(deployment, 'exchange', lambda first, second: False)
+
+
+def test_swap_folder_keeps_the_previous_version(tmpdir, exchange):
+    dest = str(tmpdir.join('dizmos', 'test'))
+
+    assert deployment.swap_folder(make_version(str(tmpdir.join('staged1')), '1'), dest) is False
+    assert deployment.swap_folder(make_version(str(tmpdir.join('staged2')), '2'), dest) is True
+
+    assert read_file(os.path.join(dest, 'index.html')) == '2'
+    assert read_file(os.path.join(deployment.get_previous_path(dest), 'index.html')) == '1'
+    assert not os.path.exists(str(tmpdir.join('staged2')))
+
+
+def test_rollback_folder(tmpdir, exchange):
+    dest = str(tmpdir.join('dizmos', 'test'))
+    deployment.swap_folder(make_version(str(tmpdir.join('staged1')), '1'), dest)
+    deployment.swap_folder(make_version(str(tmpdir.join('staged2')), '2'), dest)
+
+    deployment.rollback_folder(dest)
+    assert read_file(os.path.join(dest, 'index.html')) == '1'
+
+    # Rolling back again returns to the newer version.
+    deployment.rollback_folder(dest)
+    assert read_file(os.path.join(dest, 'index.html')) == '2'
+
+
+def test_rollback_without_previous_version(tmpdir):
+    with pytest.raises(FolderNotFoundError):
+        deployment.rollback_folder(str(tmpdir.join('dizmos', 'test')))
+
+
+def test_sync_tree(tmpdir):
+    source = str(tmpdir.join('build'))
+    dest = str(tmpdir.join('deployed'))
+    manifest = str(tmpdir.join('deploy.json'))
+
+    write_file(os.path.join(source, 'index.html'), 'html')
+    write_file(os.path.join(source, 'lib', 'a.js'), 'a')
+    write_file(os.path.join(source, 'old', 'b.js'), 'b')
+
+    assert deployment.sync_tree(source, dest, manifest) == {'added': 3, 'modified': 0, 'removed': 0}
+    assert deployment.sync_tree(source, dest, manifest) == {'added': 0, 'modified': 0, 'removed': 0}
+
+    write_file(os.path.join(source, 'lib', 'a.js'), 'changed')
+    write_file(os.path.join(source, 'c.js'), 'c')
+    os.remove(os.path.join(source, 'old', 'b.js'))
+    os.rmdir(os.path.join(source, 'old'))
+
+    assert deployment.sync_tree(source, dest, manifest) == {'added': 1, 'modified': 1, 'removed': 1}
+    assert read_file(os.path.join(dest, 'lib', 'a.js')) == 'changed'
+    assert not os.path.exists(os.path.join(dest, 'old'))
+
+
+def test_sync_tree_repairs_edited_files(tmpdir):
+    source = str(tmpdir.join('build'))
+    dest = str(tmpdir.join('deployed'))
+    manifest = str(tmpdir.join('deploy.json'))
+
+    write_file(os.path.join(source, 'index.html'), 'html')
+    deployment.sync_tree(source, dest, manifest)
+
+    write_file(os.path.join(dest, 'index.html'), 'edited')
+    assert deployment.sync_tree(source, dest, manifest)['modified'] == 1
+    assert read_file(os.path.join(dest, 'index.html')) == 'html'
@@ -0,0 +1,115 @@
+import os
+import plistlib
+from importlib import import_module
+import pytest
+
+plists = import_module('grace-dizmo.plists')
+
+
+def make_config(format='xml', **settings):
+    config = {
+        'name': 'test',
+        'version': '1.0.0',
+        'embedded_projects': [],
+        'plist': {'format': format},
+        'dizmo_settings': {
+            'display_name': 'Test',
+            'bundle_name': 'Test',
+            'bundle_identifier': 'com.example.test',
+            'width': 400,
+            'height': 300,
+            'box_inset_x': 0,
+            'box_inset_y': 0,
+            'main_html': 'index.html',
+            'api_version': '1.3',
+            'elements_version': '1.0',
+            'helper_version': None,
+            'description': 'A test dizmo',
+            'change_log': 'First version',
+            'min_space_version': '1.0',
+            'tags': ['test'],
+            'category': 'tools',
+            'hidden_dizmo': False,
+            'allow_resize': True,
+            'title_editable': True,
+            'force_update': False,
+            'tree_values': {
+                'attributes': {'settings': {'count': 3, 'ratio': 0.5}},
+                'private': {'entries': [u'\xe4', 'b', -1, 1 << 40]},
+                'public': None
+            }
+        }
+    }
+    config['dizmo_settings'].update(settings)
+
+    return config
+
+
+def load(data):
+    if hasattr(plistlib, 'loads'):
+        return plistlib.loads(data)
+    return plistlib.readPlistFromString(data)
+
+
+@pytest.fixture(autouse=True)
+def clear_rendered():
+    plists._rendered.clear()
+    yield
+    plists._rendered.clear()
+
+
+@pytest.mark.parametrize('format', ['xml', 'binary'])
+def test_render_matches_plist(format):
+    config = make_config(format)
+    data = plists.render_plist(config)
+
+    assert load(data) == plists.get_plist(config)
+    if format == 'binary':
+        assert data.startswith(b'bplist00')
+
+
+def test_test_plist():
+    plist = load(plists.render_plist(make_config(), 'Unit', test=True))
+
+    assert plist['BundleDisplayName'] == 'Test Unit'
+    assert plist['BundleIdentifier'] == 'com.example.test.unit'
+
+
+def test_render_is_reused_until_the_settings_change(monkeypatch):
+    calls = []
+    get_plist = plists.get_plist
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return get_plist(*args, **kwargs)
+
+    monkeypatch.setattr(plists, 'get_plist', counting)
+    config = make_config()
+
+    first = plists.render_plist(config)
+    assert plists.render_plist(config) is first
+    assert len(calls) == 1
+
+    config['dizmo_settings']['width'] = 500
+    assert load(plists.render_plist(config))['Width'] == 500
+    assert len(calls) == 2
+
+    config['plist']['format'] = 'binary'
+    assert plists.render_plist(config).startswith(b'bplist00')
+    assert len(calls) == 3
+
+
+def test_write_plist_writes_a_new_file(tmpdir):
+    config = make_config()
+    first = tmpdir.mkdir('first')
+    second = tmpdir.mkdir('second')
+
+    plists.write_plist(config, str(first))
+    plists.write_plist(config, str(second))
+
+    first_path = os.path.join(str(first), 'Info.plist')
+    second_path = os.path.join(str(second), 'Info.plist')
+    assert os.stat(first_path).st_ino != os.stat(second_path).st_ino
+
+    with open(second_path, 'rb') as f:
+        assert load(f.read()) == plists.get_plist(config)
@@ -0,0 +1,128 @@
+from importlib import import_module
+import pytest
+from grace.error import MissingKeyError, WrongFormatError
+
+schema = import_module('grace-dizmo.schema')
+
+
+def make_settings(**values):
+    settings = {
+        'display_name': 'Test',
+        'bundle_name': 'Test',
+        'bundle_identifier': 'com.example.test',
+        'width': 400,
+        'height': 300,
+        'box_inset_x': 0,
+        'box_inset_y': 0,
+        'description': 'A test dizmo',
+        'tags': ['test'],
+        'category': 'tools',
+        'min_space_version': '1.0',
+        'change_log': 'First version',
+        'api_version': '1.3',
+        'main_html': 'index.html'
+    }
+    settings.update(values)
+
+    return settings
+
+
+def validate(config):
+    schema.raise_errors(schema.CONFIG_SCHEMA.validate(config))
+    return config
+
+
+def test_defaults_are_filled_in():
+    config = validate({'dizmo_settings': make_settings()})
+
+    assert config['store']['concurrency'] == 4
+    assert config['deploy']['delta'] is False
+    assert config['lint']['workers'] is None
+    assert config['batch']['bundles'] == []
+    assert config['dizmo_settings']['allow_resize'] is False
+    assert config['dizmo_settings']['title_editable'] is True
+
+
+def test_defaults_are_not_shared():
+    first = validate({'dizmo_settings': make_settings()})
+    second = validate({'dizmo_settings': make_settings()})
+
+    first['batch']['bundles'].append('com.example.other')
+    assert second['batch']['bundles'] == []
+
+
+def test_missing_key():
+    settings = make_settings()
+    settings.pop('width')
+
+    with pytest.raises(MissingKeyError) as error:
+        validate({'dizmo_settings': settings})
+
+    assert 'width' in error.value.msg
+
+
+def test_all_errors_are_reported():
+    with pytest.raises(WrongFormatError) as error:
+        validate({'dizmo_settings': make_settings(category='nope', width='wide')})
+
+    assert 'category' in error.value.msg
+    assert 'width' in error.value.msg
+
+
+@pytest.mark.parametrize('section, key, value, expected', [
+    ('deploy', 'delta', 'true', True),
+    ('lint', 'cache', 'false', False),
+    ('store', 'skip_unchanged', 'False', False),
+    ('trace', 'enabled', 'true', True),
+    ('store', 'concurrency', '8', 8),
+    ('store', 'retries', '0', 0),
+    ('store', 'chunk_size', '65536', 65536),
+    ('store', 'timeout', '2.5', 2.5),
+    ('watch', 'debounce', '0.5', 0.5),
+    ('display', 'cache_lifetime', '60', 60),
+    ('lint', 'workers', '2', 2)
+])
+def test_command_line_strings_are_parsed(section, key, value, expected):
+    config = validate({'dizmo_settings': make_settings(), section: {key: value}})
+
+    assert config[section][key] == expected
+    assert type(config[section][key]) == type(expected)
+
+
+def test_command_line_size_is_parsed():
+    config = validate({'dizmo_settings': make_settings(width='500')})
+
+    assert config['dizmo_settings']['width'] == 500
+
+
+@pytest.mark.parametrize('section, key, value', [
+    ('store', 'concurrency', True),
+    ('store', 'retries', False),
+    ('store', 'timeout', True),
+    ('store', 'concurrency', 'many'),
+    ('store', 'concurrency', 0),
+    ('store', 'retries', -1),
+    ('deploy', 'delta', 'yes'),
+    ('lint', 'workers', 1.5),
+    ('plist', 'format', 'json')
+])
+def test_invalid_values_are_rejected(section, key, value):
+    with pytest.raises(WrongFormatError):
+        validate({'dizmo_settings': make_settings(), section: {key: value}})
+
+
+def test_booleans_are_not_sizes():
+    with pytest.raises(WrongFormatError):
+        validate({'dizmo_settings': make_settings(width=True)})
+
+
+def test_batch_bundles_accept_a_comma_separated_list():
+    config = validate({'dizmo_settings': make_settings(), 'batch': {'bundles': 'com.example.a, com.example.b,'}})
+
+    assert config['batch']['bundles'] == ['com.example.a', 'com.example.b']
+
+
+def test_locked_keys():
+    settings = schema.CONFIG_SCHEMA['dizmo_settings'].fields
+
+    assert sorted(settings.locked_keys({'width': 1, 'bundle_identifier': 'x', 'category': 'tools'})) == ['bundle_identifier', 'category']
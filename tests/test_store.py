@@ -0,0 +1,188 @@
+import os
+import stat
+import zipfile
+import plistlib
+import pytest
+from importlib import import_module
+from grace.error import RemoteServerError
+
+store = import_module('grace-dizmo.store')
+mockstore = import_module('grace-dizmo.mockstore')
+
+
+def make_bundle(path, bundle='com.example.test', version='1.0', size=4096):
+    info = {'BundleIdentifier': bundle, 'BundleShortVersionString': version}
+    if hasattr(plistlib, 'dumps'):
+        data = plistlib.dumps(info)
+    else:
+        data = plistlib.writePlistToString(info)
+
+    with zipfile.ZipFile(path, 'w') as z:
+        z.writestr('test/Info.plist', data)
+        z.writestr('test/payload.bin', os.urandom(size))
+
+    return path
+
+
+@pytest.fixture
+def mock_store(request):
+    servers = []
+
+    def start(**kwargs):
+        server = mockstore.MockStore(seed=1, **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.stop()
+
+
+def login(server, retries=3):
+    client = store.StoreClient(server.url, retries=retries, backoff=0)
+    assert client.login('user', 'password').status_code == 200
+    return client
+
+
+def test_whole_upload(mock_store, tmpdir):
+    server = mock_store()
+    client = login(server)
+    path = make_bundle(str(tmpdir.join('test.dzm')))
+
+    r = store.BundleUploader(path, client, show_progress=False).upload('post', client.url('dizmo'))
+
+    assert r.status_code == 201
+    assert server.state.dizmos['com.example.test']['latest'] == '1.0'
+
+
+def test_whole_upload_retries_gateway_errors(mock_store, tmpdir):
+    server = mock_store()
+    client = login(server, retries=20)
+    server.error_rate = 0.5
+    path = make_bundle(str(tmpdir.join('test.dzm')))
+
+    statuses = [store.BundleUploader(path, client, show_progress=False).upload('post', client.url('dizmo')).status_code for index in range(10)]
+
+    assert statuses == [201] * 10
+
+
+def test_whole_upload_reports_an_unavailable_store(mock_store, tmpdir):
+    server = mock_store()
+    client = login(server, retries=2)
+    server.error_rate = 1
+    path = make_bundle(str(tmpdir.join('test.dzm')))
+
+    with pytest.raises(RemoteServerError) as error:
+        store.BundleUploader(path, client, show_progress=False).upload('post', client.url('dizmo'))
+
+    assert 'status 503' in error.value.msg
+
+
+def test_ranged_upload(mock_store, tmpdir):
+    server = mock_store()
+    client = login(server)
+    path = make_bundle(str(tmpdir.join('test.dzm')), size=10000)
+
+    r = store.BundleUploader(path, client, chunk_size=1024, resumable=True, show_progress=False).upload('put', client.url('dizmo', 'com.example.test'))
+
+    assert r.status_code == 200
+    with open(path, 'rb') as f:
+        assert server.state.dizmos['com.example.test']['versions']['1.0']['size'] == len(f.read())
+
+
+def test_ranged_upload_resumes_after_errors(mock_store, tmpdir):
+    server = mock_store()
+    client = login(server, retries=20)
+    server.error_rate = 0.3
+    path = make_bundle(str(tmpdir.join('test.dzm')), size=10000)
+
+    r = store.BundleUploader(path, client, chunk_size=1024, resumable=True, show_progress=False).upload('put', client.url('dizmo', 'com.example.test'))
+
+    assert r.status_code == 200
+    assert server.state.dizmos['com.example.test']['latest'] == '1.0'
+
+
+class Response(object):
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+
+
+class IgnoringRangesClient(object):
+    retries = 1
+    retry_status = [502, 503, 504]
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+
+    def put(self, url, **kwargs):
+        self.calls.append(kwargs['headers']['Content-Range'])
+        return Response(self.statuses.pop(0))
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(method)
+        kwargs['data'].read()
+        return Response(201)
+
+    def wait(self, attempt):
+        pass
+
+
+def test_ranged_upload_falls_back_when_the_store_ignores_ranges(tmpdir):
+    path = make_bundle(str(tmpdir.join('test.dzm')), size=3000)
+    client = IgnoringRangesClient([200])
+
+    r = store.BundleUploader(path, client, chunk_size=1000, resumable=True, show_progress=False).upload('put', 'url')
+
+    assert r.status_code == 201
+    assert client.calls[-1] == 'PUT'
+
+
+def test_ranged_upload_rejects_an_early_finish(tmpdir):
+    path = make_bundle(str(tmpdir.join('test.dzm')), size=3000)
+    client = IgnoringRangesClient([308, 200])
+
+    with pytest.raises(RemoteServerError):
+        store.BundleUploader(path, client, chunk_size=1000, resumable=True, show_progress=False).upload('put', 'url')
+
+
+def test_multipart_file_streams_the_whole_body(tmpdir):
+    path = str(tmpdir.join('test.dzm'))
+    with open(path, 'wb') as f:
+        f.write(b'x' * 5000)
+
+    body = store.MultipartFile(path, chunk_size=1000)
+    data = b''.join(body)
+
+    assert len(data) == body.len
+    assert b'x' * 5000 in data
+    assert body.content_type.split('boundary=')[1].encode('utf-8') in data
+
+
+def test_session_cache_is_kept_per_user(mock_store, tmpdir):
+    server = mock_store()
+    path = str(tmpdir.join('sessions.json'))
+
+    client = login(server)
+    client.session_cache = store.SessionCache(path)
+    client.save_session('user')
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    restored = store.StoreClient(server.url, retries=0, session_cache=store.SessionCache(path))
+    assert not restored.restore_session('other')
+    assert not restored.restore_session(None)
+    assert restored.restore_session('user')
+    assert restored.get(restored.url('dizmo', 'com.example.test', 'publish')).status_code == 404
+
+    restored.forget_session('user')
+    assert store.SessionCache(path).get(server.url, 'user') is None
+    assert restored.get(restored.url('dizmo', 'com.example.test', 'publish')).status_code == 401
+
+
+def test_session_cache_expires(tmpdir):
+    cache = store.SessionCache(str(tmpdir.join('sessions.json')), lifetime=-1)
+    cache.set('http://store', 'user', [])
+
+    assert cache.get('http://store', 'user') is None
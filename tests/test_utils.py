@@ -0,0 +1,90 @@
+import os
+from importlib import import_module
+
+utils = import_module('grace-dizmo.utils')
+
+
+def write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_copy_file_does_not_share_the_inode(tmpdir):
+    source = str(tmpdir.join('Icon.svg'))
+    dest = str(tmpdir.join('build.svg'))
+    write_file(source, b'<svg/>')
+
+    utils.copy_file(source, dest)
+    assert os.stat(source).st_ino != os.stat(dest).st_ino
+
+    write_file(dest, b'<svg>changed</svg>')
+    with open(source, 'rb') as f:
+        assert f.read() == b'<svg/>'
+
+
+def test_copy_tree(tmpdir):
+    source = tmpdir.mkdir('common')
+    source.mkdir('lib').join('a.js').write('a')
+    source.join('index.html').write('html')
+
+    dest = str(tmpdir.join('test'))
+    utils.copy_tree(str(source), dest)
+
+    assert tmpdir.join('test', 'lib', 'a.js').read() == 'a'
+    assert tmpdir.join('test', 'index.html').read() == 'html'
+
+
+def test_files_identical_hashes_same_size_and_mtime(tmpdir):
+    source = str(tmpdir.join('a.png'))
+    dest = str(tmpdir.join('b.png'))
+    write_file(source, b'aaaa')
+    write_file(dest, b'bbbb')
+    os.utime(source, (1, 1))
+    os.utime(dest, (1, 1))
+
+    assert not utils.files_identical(source, dest)
+
+    write_file(dest, b'aaaa')
+    assert utils.files_identical(source, dest)
+    assert not utils.files_identical(source, str(tmpdir.join('missing.png')))
+
+
+def test_scan_tree_reuses_digests_of_unchanged_files(tmpdir):
+    tmpdir.join('a.txt').write('a')
+    tmpdir.mkdir('build').join('b.txt').write('b')
+
+    files = utils.scan_tree(str(tmpdir), exclude=['build'])
+    assert list(files) == ['a.txt']
+
+    files['a.txt']['digest'] = 'cached'
+    assert utils.scan_tree(str(tmpdir), files, exclude=['build'])['a.txt']['digest'] == 'cached'
+
+
+def test_tree_digest_depends_on_names_and_extra_values():
+    files = {'a.txt': {'digest': '1'}, 'b.txt': {'digest': '2'}}
+
+    assert utils.tree_digest(files) == utils.tree_digest(dict(files))
+    assert utils.tree_digest(files) != utils.tree_digest({'a.txt': {'digest': '1'}})
+    assert utils.tree_digest(files, 'option') != utils.tree_digest(files)
+
+
+def test_write_and_load_manifest(tmpdir):
+    path = str(tmpdir.join('cache', 'manifest.json'))
+
+    assert utils.load_manifest(path) == {}
+    utils.write_manifest(path, {'files': {'a': 1}})
+    assert utils.load_manifest(path) == {'files': {'a': 1}}
+
+    write_file(path, b'[1, 2]')
+    assert utils.load_manifest(path) == {}
+
+
+def test_run_parallel_keeps_the_order():
+    assert utils.run_parallel(lambda value: value * 2, list(range(20)), 4) == [value * 2 for value in range(20)]
+    assert utils.run_parallel(lambda value: value, []) == []
+
+
+def test_format_size():
+    assert utils.format_size(512) == '512.0 B'
+    assert utils.format_size(2048) == '2.0 KB'
+    assert utils.format_size(3 * 1024 * 1024 * 1024) == '3.0 GB'